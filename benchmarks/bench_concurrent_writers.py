@@ -0,0 +1,117 @@
+"""Stress test for several processes writing one assessment.
+
+Run from the repository root:
+
+    python benchmarks/bench_concurrent_writers.py [--writers N] [--updates M]
+
+Every writer process performs M read-modify-write updates through
+``AssessmentStore.update``: it increments a counter kept in the note of
+A.5.1 and toggles the status of a control of its own.  Afterwards the
+counter must equal N * M; any shortfall is a lost update.  ``--no-cas``
+commits without the version check to show what the check prevents.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from iso27001_catalog import default_catalog  # noqa: E402
+from iso27001_store import ControlStatus, open_store  # noqa: E402
+
+COUNTER_CONTROL = "A.5.1"
+
+
+def writer(data_file, backend, journal_limit, updates, own_control, use_cas,
+           start, results):
+    options = {}
+    if backend == "json":
+        options["journal_limit"] = journal_limit
+    store = open_store(data_file, backend, catalog=default_catalog(),
+                       **options)
+    start.wait()
+    conflicts = 0
+    for i in range(updates):
+        status = (ControlStatus.IMPLEMENTED if i % 2 == 0
+                  else ControlStatus.IN_PROGRESS)
+
+        def changes(snapshot):
+            count = int(snapshot.note(COUNTER_CONTROL) or 0)
+            return ({own_control: status},
+                    {COUNTER_CONTROL: str(count + 1)})
+
+        if use_cas:
+            conflicts += store.update(changes, retries=None)
+        else:
+            store.commit(*changes(store.snapshot()))
+    store.close()
+    results.put(conflicts)
+
+
+def run(args, data_file):
+    store = open_store(data_file, args.backend, catalog=default_catalog())
+    store.initialize()
+    store.close()
+
+    control_ids = default_catalog().ids
+    start = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=writer, args=(
+            data_file, args.backend, args.journal_limit, args.updates,
+            control_ids[1 + n % (len(control_ids) - 1)], not args.no_cas,
+            start, results))
+        for n in range(args.writers)]
+    for process in processes:
+        process.start()
+    started = time.perf_counter()
+    start.set()
+    conflicts = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    store = open_store(data_file, args.backend, catalog=default_catalog())
+    final = int(store.get_note(COUNTER_CONTROL) or 0)
+    drift = store.check_counters()
+    store.close()
+    expected = args.writers * args.updates
+    return expected, final, conflicts, elapsed, drift
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--backend", choices=("json", "sqlite"),
+                        default="json")
+    parser.add_argument("--journal-limit", type=int, default=16 * 1024,
+                        help="JSON journal size that triggers compaction "
+                             "(small by default so compactions race too)")
+    parser.add_argument("--no-cas", action="store_true",
+                        help="commit without the state version check")
+    args = parser.parse_args(argv)
+
+    suffix = ".db" if args.backend == "sqlite" else ".json"
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, "iso27001_data" + suffix)
+        expected, final, conflicts, elapsed, drift = run(args, data_file)
+
+    lost = expected - final
+    print(f"backend:        {args.backend}"
+          f"{' (no compare-and-swap)' if args.no_cas else ''}")
+    print(f"writers:        {args.writers} x {args.updates} updates")
+    print(f"elapsed:        {elapsed:.2f} s")
+    print(f"throughput:     {expected / elapsed:.0f} updates/s")
+    print(f"cas retries:    {conflicts}")
+    print(f"lost updates:   {lost}")
+    print(f"counter drift:  {len(drift)}")
+    return 1 if lost or drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
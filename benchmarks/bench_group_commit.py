@@ -0,0 +1,104 @@
+"""Throughput of the group-commit writer against direct commits.
+
+Run from the repository root:
+
+    python benchmarks/bench_group_commit.py [--updates N] [--clients 1 4 16]
+
+"direct" commits every change through its own ``JsonStore.commit`` (one
+journal append and fsync each).  "writer" starts ``iso27001_writer.py
+serve`` and submits the same changes from C concurrent client threads,
+each waiting for its acknowledgement; concurrent changes share a commit.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from iso27001_catalog import default_catalog  # noqa: E402
+from iso27001_store import ControlStatus, open_store  # noqa: E402
+from iso27001_writer import WriterClient  # noqa: E402
+
+STATUSES = (ControlStatus.IN_PROGRESS, ControlStatus.IMPLEMENTED)
+
+
+def changes(count, offset=0):
+    control_ids = default_catalog().ids
+    for i in range(offset, offset + count):
+        yield control_ids[i % len(control_ids)], STATUSES[i % 2]
+
+
+def bench_direct(data_file, updates):
+    store = open_store(data_file, catalog=default_catalog())
+    store.initialize()
+    started = time.perf_counter()
+    for control_id, status in changes(updates):
+        store.commit(statuses={control_id: status})
+    elapsed = time.perf_counter() - started
+    store.close()
+    return elapsed
+
+
+def bench_writer(data_file, socket_path, updates, clients):
+    daemon = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, "iso27001_writer.py"),
+         "--socket", socket_path, "serve", "--data-file", data_file],
+        stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 10
+        while not os.path.exists(socket_path):
+            if time.time() > deadline or daemon.poll() is not None:
+                raise RuntimeError("writer daemon did not start")
+            time.sleep(0.01)
+
+        per_client = updates // clients
+        connections = [WriterClient(socket_path) for _ in range(clients)]
+
+        def run(client, offset):
+            for control_id, status in changes(per_client, offset):
+                client.submit({control_id: status})
+
+        threads = [threading.Thread(target=run, args=(client, n * per_client))
+                   for n, client in enumerate(connections)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        stats = connections[0].stats()
+        for client in connections:
+            client.close()
+        return elapsed, per_client * clients, stats
+    finally:
+        daemon.terminate()
+        daemon.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        elapsed = bench_direct(os.path.join(tmp, "direct.json"), args.updates)
+        print(f"{'mode':<16}{'updates/s':>12}{'avg batch':>12}")
+        print(f"{'direct':<16}{args.updates / elapsed:>12.0f}{1:>12}")
+        for clients in args.clients:
+            data_file = os.path.join(tmp, f"writer{clients}.json")
+            socket_path = os.path.join(tmp, f"writer{clients}.sock")
+            elapsed, done, stats = bench_writer(data_file, socket_path,
+                                                args.updates, clients)
+            print(f"{f'writer x{clients}':<16}{done / elapsed:>12.0f}"
+                  f"{stats['average_batch']:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Cost of status history on commits, and point-in-time query latency.
+
+Run from the repository root:
+
+    python benchmarks/bench_history.py [--updates N] [--queries N]
+
+"off" commits with history disabled, "on" with each commit's old statuses
+and actor added to its journal entry and appended to the history by a
+background thread.  The as-of queries pick random moments over the
+recorded log; each replays at most one checkpoint interval.  The trend
+reports read the daily and weekly rollups kept up to date in the
+background.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from iso27001_catalog import default_catalog  # noqa: E402
+from iso27001_history import PERIODS  # noqa: E402
+from iso27001_store import ControlStatus, open_store  # noqa: E402
+
+STATUSES = (ControlStatus.IN_PROGRESS, ControlStatus.IMPLEMENTED,
+            ControlStatus.NOT_STARTED, ControlStatus.NOT_APPLICABLE)
+
+
+def bench_commits(data_file, updates, history):
+    catalog = default_catalog()
+    control_ids = catalog.ids
+    store = open_store(data_file, catalog=catalog, history=history)
+    store.initialize()
+    started = time.perf_counter()
+    for i in range(updates):
+        store.commit(statuses={control_ids[i % len(control_ids)]:
+                               STATUSES[i // len(control_ids) % 4]})
+    elapsed = time.perf_counter() - started
+    return store, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=3000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'history':<10}{'commits/s':>12}{'us/commit':>12}")
+        for label, history in (("off", False), ("on", None)):
+            store, elapsed = bench_commits(
+                os.path.join(tmp, f"{label}.json"), args.updates, history)
+            print(f"{label:<10}{args.updates / elapsed:>12.0f}"
+                  f"{elapsed / args.updates * 1e6:>12.1f}")
+
+        timestamps = [transition.timestamp
+                      for transition in store.history.transitions()]
+        moments = [random.choice(timestamps) for _ in range(args.queries)]
+        started = time.perf_counter()
+        for moment in moments:
+            store.history.statuses_at(moment)
+        elapsed = time.perf_counter() - started
+        print(f"\n{len(timestamps)} transitions recorded; statuses_at: "
+              f"{elapsed / args.queries * 1e3:.2f} ms per query")
+        for period in PERIODS:
+            started = time.perf_counter()
+            buckets = len(list(store.history.rollups(period)))
+            elapsed = time.perf_counter() - started
+            print(f"{period} trend: {buckets} buckets in "
+                  f"{elapsed * 1e3:.2f} ms")
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
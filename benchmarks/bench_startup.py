@@ -0,0 +1,71 @@
+"""Cold- and warm-start timings for the assistant.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--runs N]
+
+"Cold" removes the precompiled catalog caches before every run, "warm"
+leaves them in place.  Each run is a fresh interpreter that constructs an
+assistant against an empty assessment, i.e. the time until the menu would
+be shown.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from iso27001_catalog import cache_paths_for  # noqa: E402
+
+EDITIONS = {
+    "Main_ISO_ver1_1": "iso27001_controls.json",
+    "main_iso27001_complete": "iso27001_controls_complete.json",
+}
+
+STARTUP_SNIPPET = (
+    "import sys; import {module} as m; "
+    "m.ISO27001ImplementationAssistant(data_file=sys.argv[1])"
+)
+
+
+def clear_cache(catalog_file):
+    for cache_path in cache_paths_for(os.path.join(REPO_ROOT, catalog_file)):
+        try:
+            os.remove(cache_path)
+        except FileNotFoundError:
+            pass
+
+
+def time_startup(module, data_file):
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", STARTUP_SNIPPET.format(module=module),
+                    data_file], cwd=REPO_ROOT, check=True)
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, "iso27001_data.json")
+        print(f"{'edition':<26}{'cold (ms)':>12}{'warm (ms)':>12}")
+        for module, catalog_file in EDITIONS.items():
+            cold = []
+            for _ in range(args.runs):
+                clear_cache(catalog_file)
+                cold.append(time_startup(module, data_file))
+            warm = [time_startup(module, data_file) for _ in range(args.runs)]
+            print(f"{module:<26}{statistics.median(cold) * 1000:>12.1f}"
+                  f"{statistics.median(warm) * 1000:>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
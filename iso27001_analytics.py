@@ -0,0 +1,157 @@
+import argparse
+import json
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, only needed for analytics
+    np = None
+
+from iso27001_catalog import default_catalog
+from iso27001_portfolio import STATUS_CODES, Portfolio, StatusLayout
+from iso27001_store import ControlStatus
+
+IMPLEMENTED = STATUS_CODES[ControlStatus.IMPLEMENTED]
+NOT_APPLICABLE = STATUS_CODES[ControlStatus.NOT_APPLICABLE]
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Portfolio analytics require NumPy "
+                          "(pip install numpy)")
+
+
+class PortfolioAnalytics:
+    """Vectorized statistics over a ``Portfolio`` (tenants x controls).
+
+    Rates are implemented controls divided by applicable controls, i.e.
+    controls marked Not Applicable are left out of both sides.  A rate
+    with nothing applicable is NaN.
+    """
+
+    def __init__(self, portfolio, catalog):
+        _require_numpy()
+        if portfolio.layout.catalog_key != catalog.key:
+            raise ValueError(f"Portfolio was packed for "
+                             f"{portfolio.layout.catalog_key}, not {catalog.key}")
+        self.portfolio = portfolio
+        self.catalog = catalog
+        self.control_ids = portfolio.layout.control_ids
+        self.matrix = np.frombuffer(bytes(portfolio.buffer), dtype=np.uint8) \
+            .reshape(len(portfolio), portfolio.layout.width)
+        self.implemented = self.matrix == IMPLEMENTED
+        self.applicable = self.matrix != NOT_APPLICABLE
+
+        self.domains = list(catalog.by_domain)
+        membership = np.zeros((portfolio.layout.width, len(self.domains)),
+                              dtype=np.int32)
+        offsets = portfolio.layout.offsets
+        for column, domain in enumerate(self.domains):
+            for control_id in catalog.by_domain[domain]:
+                membership[offsets[control_id], column] = 1
+        self._domain_membership = membership
+
+    def control_implementation_rates(self):
+        """Share of tenants that implemented each control."""
+        return _ratio(self.implemented.sum(axis=0),
+                      self.applicable.sum(axis=0))
+
+    def tenant_completion(self):
+        """Share of applicable controls each tenant has implemented."""
+        return _ratio(self.implemented.sum(axis=1),
+                      self.applicable.sum(axis=1))
+
+    def domain_completion(self):
+        """Tenants x domains completion matrix (columns follow ``domains``)."""
+        implemented = self.implemented.astype(np.int32) @ self._domain_membership
+        applicable = self.applicable.astype(np.int32) @ self._domain_membership
+        return _ratio(implemented, applicable)
+
+    def percentile_ranks(self):
+        """Percentile (0-100] of each tenant's overall completion."""
+        completion = np.nan_to_num(self.tenant_completion(), nan=0.0)
+        if completion.size == 0:
+            return completion
+        ordered = np.sort(completion)
+        return (np.searchsorted(ordered, completion, side='right')
+                / completion.size * 100.0)
+
+    def least_implemented(self, count=10):
+        rates = self.control_implementation_rates()
+        order = np.argsort(np.where(np.isnan(rates), np.inf, rates),
+                           kind='stable')[:count]
+        return [(self.control_ids[i], _float(rates[i])) for i in order]
+
+    def summary(self, top=10):
+        rates = self.control_implementation_rates()
+        domains = self.domain_completion()
+        completion = self.tenant_completion()
+        ranks = self.percentile_ranks()
+        return {
+            "catalog": self.catalog.key,
+            "tenants": len(self.portfolio),
+            "control_implementation_rates": {
+                control_id: _float(rate)
+                for control_id, rate in zip(self.control_ids, rates)},
+            "domain_completion": {
+                domain: _float(np.nanmean(domains[:, column]))
+                if len(self.portfolio) else None
+                for column, domain in enumerate(self.domains)},
+            "tenants_by_completion": [
+                {"tenant": tenant, "completion": _float(completion[row]),
+                 "percentile": _float(ranks[row])}
+                for row, tenant in enumerate(self.portfolio.tenants)],
+            "least_implemented": [
+                {"control": control_id, "rate": rate}
+                for control_id, rate in self.least_implemented(top)],
+        }
+
+
+def _ratio(numerator, denominator):
+    return np.divide(numerator, denominator,
+                     out=np.full(np.shape(numerator), np.nan),
+                     where=denominator > 0)
+
+
+def _float(value):
+    value = float(value)
+    return None if value != value else round(value, 4)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Portfolio analytics across many ISO 27001 assessments.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--tenants", metavar="ROOT",
+                        help="tenant registry directory to analyse")
+    source.add_argument("--packed", metavar="FILE",
+                        help="packed portfolio file written by Portfolio.save")
+    parser.add_argument("--top", type=int, default=10,
+                        help="number of least-implemented controls to list")
+    args = parser.parse_args(argv)
+
+    catalog = default_catalog()
+    if args.packed:
+        with open(args.packed, 'rb') as f:
+            portfolio = Portfolio.load(f)
+    else:
+        from iso27001_tenants import TenantRegistry
+        registry = TenantRegistry(args.tenants, catalog=catalog)
+        try:
+            portfolio = Portfolio.from_registry(
+                registry, StatusLayout.from_catalog(catalog))
+        finally:
+            registry.close()
+
+    try:
+        analytics = PortfolioAnalytics(portfolio, catalog)
+    except ImportError as e:
+        print(e, file=sys.stderr)
+        return 1
+    json.dump(analytics.summary(args.top), sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def approximate_size(value):
+    """Rough memory footprint of strings, bytes and nested containers."""
+    if isinstance(value, (str, bytes, bytearray)):
+        return sys.getsizeof(value)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += approximate_size(key) + approximate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += approximate_size(item)
+    return size
+
+
+class RenderCache:
+    """LRU of rendered views, bounded by an approximate size in bytes.
+
+    A view of an assessment is a pure function of the catalog and the
+    state, so entries are keyed on ``(catalog key, scope, state version,
+    last updated, view)`` where ``scope`` tells assessments apart (their
+    absolute data file path).  The timestamp keeps a file that was
+    deleted and recreated, and so restarted at version 0, from hitting the
+    old file's entries.  Superseded versions are never looked up again and
+    simply age out.  Cached values are shared between callers and must not
+    be modified.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=None):
+        if size is None:
+            size = approximate_size(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def render(self, catalog, scope, snapshot, view, build):
+        """Return the cached ``view`` of ``snapshot``, calling ``build`` on a miss."""
+        key = (catalog.key, scope, snapshot.version, snapshot.last_updated,
+               view)
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, build())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self.bytes,
+                "max_bytes": self.max_bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def shared_render_cache():
+    """The process-wide cache, sized by ``$ISO27001_RENDER_CACHE_BYTES``."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                max_bytes = int(os.environ.get("ISO27001_RENDER_CACHE_BYTES",
+                                               DEFAULT_MAX_BYTES))
+                _shared_cache = RenderCache(max_bytes)
+    return _shared_cache
@@ -0,0 +1,273 @@
+import hashlib
+import json
+import marshal
+import os
+import re
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+
+CATALOG_FORMAT = 1
+CACHE_FORMAT = 2
+
+DEFAULT_CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    "iso27001_controls.json")
+DEFAULT_CATALOG_NAME = "27002-guidance"
+
+# Fields kept resident for every control unless the catalog file lists its
+# own "index_fields"; everything else (descriptions, implementation steps,
+# 27002 guidance...) is loaded on first access.
+INDEX_FIELDS = ('title', 'domain')
+
+# Accepts "A.5.1", "a5.1", "5.1", "A 5 1"...
+CONTROL_ID_PATTERN = re.compile(
+    r"^\s*(?:A\s*\.?\s*)?(\d+)\s*[.\s]\s*(\d+)\s*$", re.IGNORECASE)
+
+
+def freeze(value):
+    """Return a read-only copy of nested dicts and lists."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class ControlRecord(Mapping):
+    """Read-only view of one control.
+
+    Index fields are answered from memory; the first lookup of any other
+    field loads the detail tier of the whole catalog.
+    """
+
+    __slots__ = ('_catalog', '_control_id', '_summary')
+
+    def __init__(self, catalog, control_id, summary):
+        self._catalog = catalog
+        self._control_id = control_id
+        self._summary = summary
+
+    def _fields(self):
+        fields = dict(self._summary)
+        fields.update(self._catalog.details(self._control_id))
+        return fields
+
+    def __getitem__(self, key):
+        if key in self._summary:
+            return self._summary[key]
+        return self._catalog.details(self._control_id)[key]
+
+    def __iter__(self):
+        return iter(self._fields())
+
+    def __len__(self):
+        return len(self._fields())
+
+    def __repr__(self):
+        return f"<ControlRecord {self._control_id}>"
+
+
+class ControlCatalog:
+    """Immutable controls and roadmap phases shared by every assistant.
+
+    ``index`` maps control IDs to their index fields.  ``load_details`` is
+    called at most once, when a heavy field is first needed, and must
+    return a mapping of control ID to the remaining fields.
+    """
+
+    __slots__ = ('name', 'version', 'controls', 'phases', 'ids',
+                 'by_domain', 'by_clause', 'domain_clauses', 'phase_controls',
+                 '_id_lookup', '_details', '_load_details', '_lock')
+
+    def __init__(self, name, index, phases, version=None, load_details=None):
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'phases', freeze(phases))
+        object.__setattr__(self, 'controls', MappingProxyType({
+            control_id: ControlRecord(self, control_id, freeze(summary))
+            for control_id, summary in index.items()}))
+        object.__setattr__(self, '_details', None)
+        object.__setattr__(self, '_load_details', load_details)
+        object.__setattr__(self, '_lock', threading.Lock())
+        self._build_indexes()
+
+    def _build_indexes(self):
+        by_domain = {}
+        by_clause = {}
+        domain_clauses = {}
+        id_lookup = {}
+        for control_id, control in self.controls.items():
+            clause = control_id.rsplit('.', 1)[0]
+            domain = control['domain']
+            by_domain.setdefault(domain, []).append(control_id)
+            by_clause.setdefault(clause, []).append(control_id)
+            domain_clauses.setdefault(domain, clause)
+            id_lookup[_id_key(control_id)] = control_id
+
+        object.__setattr__(self, 'ids', tuple(self.controls))
+        object.__setattr__(self, 'by_domain', MappingProxyType(
+            {domain: tuple(ids) for domain, ids in by_domain.items()}))
+        object.__setattr__(self, 'by_clause', MappingProxyType(
+            {clause: tuple(ids) for clause, ids in by_clause.items()}))
+        object.__setattr__(self, 'domain_clauses',
+                           MappingProxyType(domain_clauses))
+        object.__setattr__(self, '_id_lookup', id_lookup)
+
+        phase_controls = {}
+        for phase in self.phases:
+            control_ids = []
+            for ref in phase.get('controls', ()):
+                if ref in self.by_clause:
+                    control_ids.extend(self.by_clause[ref])
+                elif self.normalize_id(ref) is not None:
+                    control_ids.append(self.normalize_id(ref))
+                else:
+                    raise ValueError(f"Phase {phase['phase']} references "
+                                     f"unknown control or clause {ref!r}")
+            phase_controls[phase['phase']] = tuple(control_ids)
+        object.__setattr__(self, 'phase_controls',
+                           MappingProxyType(phase_controls))
+
+    @property
+    def key(self):
+        return f"{self.name}@{self.version}"
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ControlCatalog is read-only")
+
+    def normalize_id(self, raw_id):
+        """Return the canonical ID for ``raw_id`` or None if unknown."""
+        return self._id_lookup.get(_id_key(raw_id))
+
+    @property
+    def details_loaded(self):
+        return self._details is not None
+
+    def details(self, control_id):
+        details = self._details
+        if details is None:
+            with self._lock:
+                details = self._details
+                if details is None:
+                    loaded = self._load_details() if self._load_details else {}
+                    details = freeze(loaded)
+                    object.__setattr__(self, '_details', details)
+        return details.get(control_id, {})
+
+
+def _id_key(raw_id):
+    match = CONTROL_ID_PATTERN.match(raw_id)
+    if match is None:
+        return None
+    return (int(match.group(1)), int(match.group(2)))
+
+
+def split_catalog(data):
+    """Split a catalog document into its index and detail tiers."""
+    index_fields = tuple(data.get('index_fields', INDEX_FIELDS))
+    index = {}
+    details = {}
+    for control_id, control in data['controls'].items():
+        index[control_id] = {field: control[field] for field in index_fields}
+        details[control_id] = {field: value for field, value in control.items()
+                               if field not in index_fields}
+    header = {'name': data.get('name'), 'version': data.get('version'),
+              'phases': data['phases'], 'index': index}
+    return header, details
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def shared_catalog(name, build):
+    """Return the process-wide catalog ``name``.
+
+    ``build`` is called once, on first use, and must return a
+    ``ControlCatalog`` such as the one produced by ``load_catalog_file``.
+    """
+    catalog = _catalogs.get(name)
+    if catalog is not None:
+        return catalog
+    with _catalogs_lock:
+        catalog = _catalogs.get(name)
+        if catalog is None:
+            catalog = _catalogs[name] = build()
+    return catalog
+
+
+def default_catalog():
+    """The 27002-guidance catalog used by ``Main_ISO_ver1_1.py``."""
+    return shared_catalog(DEFAULT_CATALOG_NAME,
+                          lambda: load_catalog_file(DEFAULT_CATALOG_FILE))
+
+
+def cache_paths_for(path):
+    directory, filename = os.path.split(os.path.abspath(path))
+    cache_dir = os.path.join(directory, "__pycache__")
+    return (os.path.join(cache_dir, filename + ".index.cache"),
+            os.path.join(cache_dir, filename + ".details.cache"))
+
+
+def load_catalog_file(path):
+    """Load a catalog document, preferring its precompiled marshal caches.
+
+    The index and detail tiers are cached separately in ``__pycache__``
+    next to the catalog, each tagged with the SHA-256 of the source file,
+    so editing the JSON regenerates them on the next load.  Only the index
+    tier is read at startup.  Failing to write the caches (read-only
+    install) only costs the speed-up.
+    """
+    with open(path, 'rb') as f:
+        source = f.read()
+    digest = hashlib.sha256(source).hexdigest()
+    index_cache, details_cache = cache_paths_for(path)
+
+    header = _read_cache(index_cache, digest)
+    if header is None:
+        header, details = split_catalog(_parse_catalog(path, source))
+        _write_cache(index_cache, (CACHE_FORMAT, digest, header))
+        _write_cache(details_cache, (CACHE_FORMAT, digest, details))
+
+    def load_details():
+        details = _read_cache(details_cache, digest)
+        if details is None:
+            with open(path, 'rb') as f:
+                details = split_catalog(_parse_catalog(path, f.read()))[1]
+        return details
+
+    return ControlCatalog(header['name'], header['index'], header['phases'],
+                          header['version'], load_details)
+
+
+def _parse_catalog(path, source):
+    data = json.loads(source)
+    if data.get('format') != CATALOG_FORMAT:
+        raise ValueError(f"Unsupported catalog format in {path}: "
+                         f"{data.get('format')!r}")
+    return data
+
+
+def _read_cache(cache_path, digest):
+    try:
+        with open(cache_path, 'rb') as f:
+            cache_format, cached_digest, payload = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if cache_format != CACHE_FORMAT or cached_digest != digest:
+        return None
+    return payload
+
+
+def _write_cache(cache_path, payload):
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            marshal.dump(payload, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
@@ -0,0 +1,389 @@
+import argparse
+import json
+import os
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+
+from iso27001_cache import shared_render_cache
+from iso27001_catalog import default_catalog
+from iso27001_export import (VIEW_FIELDS, export_portfolio, export_trend,
+                             export_view)
+from iso27001_history import PERIODS
+from iso27001_import import (ImportFormatError, apply_plan, detect_format,
+                             plan_import, read_rows)
+from iso27001_reports import (compliance_summary, control_detail,
+                              control_register, report_lines, roadmap_lines,
+                              roadmap_summary, trend_lines, trend_rows)
+from iso27001_store import (DEFAULT_DATA_FILES, ControlStatus, StateSnapshot,
+                            open_store, parse_status, resolve_backend)
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+
+
+class CommandError(Exception):
+    """A subcommand failed in a way the user can fix (bad ID, status...)."""
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="Main_ISO_ver1_1.py",
+        description="Non-interactive ISO 27001:2022 Implementation Assistant. "
+                    "Run without arguments for the interactive menu.")
+    parser.add_argument("--data-file",
+                        help="assessment file (default: iso27001_data.json)")
+    parser.add_argument("--backend", choices=("json", "sqlite"))
+    parser.add_argument("--tenants", metavar="ROOT",
+                        help="tenant registry directory (requires --tenant)")
+    parser.add_argument("--tenant", help="tenant ID inside --tenants")
+    parser.add_argument("--actor",
+                        help="name recorded in the status history "
+                             "(default: $ISO27001_ACTOR or the login name)")
+    commands = parser.add_subparsers(dest="command", required=True,
+                                     metavar="COMMAND")
+
+    list_cmd = commands.add_parser("list", help="list controls and statuses")
+    list_cmd.add_argument("--domain", help="only controls of this domain")
+    list_cmd.add_argument("--status", type=_status_arg,
+                          help="only controls with this status")
+    list_cmd.add_argument("--format", choices=("text", "json"), default="text")
+    list_cmd.add_argument("--as-of", metavar="DATE",
+                          help="statuses as recorded at DATE (ISO 8601; a "
+                               "bare date means the end of that day)")
+
+    show_cmd = commands.add_parser("show", help="show one control in detail")
+    show_cmd.add_argument("control_id")
+    show_cmd.add_argument("--format", choices=("text", "json"), default="text")
+
+    set_cmd = commands.add_parser("set-status",
+                                  help="set a control's status and note")
+    set_cmd.add_argument("control_id")
+    set_cmd.add_argument("status", type=_status_arg)
+    set_cmd.add_argument("--note", help="note to store with the control")
+
+    report_cmd = commands.add_parser("report", help="compliance report")
+    report_cmd.add_argument("--format", choices=("text", "json"),
+                            default="text")
+    report_cmd.add_argument("--trend", choices=PERIODS,
+                            help="add a daily or weekly trend section")
+    report_cmd.add_argument("--since", metavar="DATE",
+                            help="first period of the trend section")
+
+    roadmap_cmd = commands.add_parser("roadmap",
+                                      help="implementation roadmap")
+    roadmap_cmd.add_argument("--format", choices=("text", "json"),
+                             default="text")
+
+    import_cmd = commands.add_parser(
+        "import", help="bulk-import statuses from CSV or JSON",
+        description="Rows carry control_id, status and an optional note (and "
+                    "tenant, with --tenants). Bad rows are reported by line; "
+                    "all valid rows are applied in one commit per assessment.")
+    import_cmd.add_argument("file", help="CSV/JSON file, or - for stdin")
+    import_cmd.add_argument("--format", choices=("csv", "json"),
+                            help="default: from the extension or contents")
+    import_cmd.add_argument("--dry-run", action="store_true",
+                            help="validate only; change nothing")
+
+    history_cmd = commands.add_parser(
+        "history", help="recorded status transitions")
+    history_cmd.add_argument("control_id", nargs="?")
+    history_cmd.add_argument("--since", metavar="DATE")
+    history_cmd.add_argument("--until", metavar="DATE")
+    history_cmd.add_argument("--limit", type=int)
+    history_cmd.add_argument("--format", choices=("text", "json"),
+                             default="text")
+
+    export_cmd = commands.add_parser(
+        "export", help="export the report, control register, roadmap or "
+                       "trend",
+        description="With --tenants and no --tenant, every tenant is "
+                    "exported with a leading tenant column (except trend, "
+                    "which covers one assessment).")
+    export_cmd.add_argument("view", choices=tuple(VIEW_FIELDS) + ("trend",))
+    export_cmd.add_argument("--period", choices=PERIODS, default="week",
+                            help="trend buckets (default: week)")
+    export_cmd.add_argument("--since", metavar="DATE")
+    export_cmd.add_argument("--until", metavar="DATE")
+    export_cmd.add_argument("--format", choices=("csv", "jsonl", "html"),
+                            default="csv")
+    export_cmd.add_argument("--output", "-o", metavar="FILE",
+                            help="write to FILE instead of stdout")
+    return parser
+
+
+def _status_arg(text):
+    try:
+        return parse_status(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+# Stores opened by this process, reused by later main() calls so that a
+# long-running caller such as iso27001_daemon keeps their cached state.
+_open_stores = {}
+
+
+def open_registry(args, catalog):
+    from iso27001_tenants import TenantRegistry
+    key = ("tenants", os.path.abspath(args.tenants),
+           resolve_backend(backend=args.backend))
+    registry = _open_stores.get(key)
+    if registry is None:
+        registry = _open_stores[key] = TenantRegistry(
+            args.tenants, args.backend, catalog=catalog)
+    return registry
+
+
+def open_assessment(args, catalog):
+    if args.tenant or args.tenants:
+        if not (args.tenant and args.tenants):
+            raise CommandError("--tenants and --tenant must be used together")
+        return open_registry(args, catalog).get(args.tenant)
+    backend = resolve_backend(args.data_file, args.backend)
+    key = ("store", os.path.abspath(args.data_file
+                                    or DEFAULT_DATA_FILES[backend]), backend)
+    store = _open_stores.get(key)
+    if store is None:
+        store = _open_stores[key] = open_store(key[1], backend,
+                                               catalog=catalog)
+    store.initialize()
+    return store
+
+
+def resolve_control(catalog, raw_id):
+    control_id = catalog.normalize_id(raw_id)
+    if control_id is None:
+        raise CommandError(f"Unknown control ID: {raw_id}")
+    return control_id
+
+
+def cmd_list(args, catalog, out, err):
+    if args.domain:
+        domain = next((name for name in catalog.by_domain
+                       if name.lower() == args.domain.lower()), None)
+        if domain is None:
+            raise CommandError(f"Unknown domain: {args.domain} (expected one "
+                               f"of: {', '.join(catalog.by_domain)})")
+        control_ids = catalog.by_domain[domain]
+    else:
+        control_ids = catalog.ids
+    store = open_assessment(args, catalog)
+    snapshot = store.snapshot()
+    if args.as_of:
+        snapshot = StateSnapshot({
+            'controls_status': {
+                control_id: status.name for control_id, status in
+                _history(store).statuses_at(args.as_of).items()},
+            'control_notes': snapshot.notes, 'last_updated': args.as_of})
+    rows = control_register(catalog, snapshot, control_ids)
+    if args.status is not None:
+        rows = (row for row in rows if row["status"] == args.status.name)
+    if args.format == "json":
+        json.dump(list(rows), out, indent=2)
+        out.write("\n")
+        return
+    for row in rows:
+        out.write(f"{row['control']}\t{ControlStatus[row['status']].value}\t"
+                  f"{row['domain']}\t{row['title']}\n")
+
+
+def cmd_show(args, catalog, out, err):
+    control_id = resolve_control(catalog, args.control_id)
+    detail = control_detail(catalog, open_assessment(args, catalog).snapshot(),
+                            control_id)
+    if args.format == "json":
+        json.dump(detail, out, indent=2)
+        out.write("\n")
+        return
+    out.write(f"=== {control_id}: {detail['title']} ===\n\n")
+    out.write(f"Status: {ControlStatus[detail['status']].value}\n")
+    out.write(f"Domain: {detail['domain']}\n")
+    if 'description' in detail:
+        out.write(f"\nDescription: {detail['description']}\n")
+    if 'implementation' in detail:
+        out.write("\nImplementation Steps:\n")
+        for i, step in enumerate(detail['implementation'], 1):
+            out.write(f"{i}. {step}\n")
+    if '27002_guidance' in detail:
+        out.write(f"\nISO 27002 Guidance:\n{detail['27002_guidance']}\n")
+    if detail['note']:
+        out.write(f"\nYour Notes: {detail['note']}\n")
+
+
+def cmd_set_status(args, catalog, out, err):
+    control_id = resolve_control(catalog, args.control_id)
+    store = open_assessment(args, catalog)
+    store.commit(statuses={control_id: args.status},
+                 notes={control_id: args.note} if args.note is not None
+                 else None, actor=args.actor)
+    out.write(f"Status for {control_id} updated to: {args.status.value}\n")
+
+
+def cmd_report(args, catalog, out, err):
+    # Rendered through the shared cache, so a long-lived process answering
+    # repeated reports (see the daemon mode) renders each version once.
+    store = open_assessment(args, catalog)
+    snapshot = store.snapshot()
+    cache = shared_render_cache()
+    summary = cache.render(catalog, os.path.abspath(store.data_file),
+                           snapshot, "report",
+                           lambda: compliance_summary(catalog, snapshot))
+    trend = None
+    if args.trend:
+        trend = list(trend_rows(catalog, _history(store), args.trend,
+                                args.since))
+    if args.format == "json":
+        if trend is not None:
+            summary = dict(summary, trend=trend)
+        json.dump(summary, out, indent=2)
+        out.write("\n")
+    else:
+        out.write(cache.render(
+            catalog, os.path.abspath(store.data_file), snapshot,
+            "report.txt", lambda: "\n".join(report_lines(summary)) + "\n"))
+        if trend is not None:
+            out.write("\n" + "\n".join(trend_lines(trend, args.trend)) + "\n")
+
+
+def cmd_roadmap(args, catalog, out, err):
+    # The roadmap is catalog-only; no assessment state is opened.
+    phases = roadmap_summary(catalog)
+    if args.format == "json":
+        json.dump(phases, out, indent=2)
+        out.write("\n")
+    else:
+        out.write("\n".join(roadmap_lines(phases)) + "\n")
+
+
+def cmd_import(args, catalog, out, err):
+    if args.tenant and not args.tenants:
+        raise CommandError("--tenant requires --tenants")
+    registry = open_registry(args, catalog) if args.tenants else None
+
+    if args.file == "-":
+        f = sys.stdin
+        fmt = args.format or "csv"
+    else:
+        f = open(args.file, "r", newline="", encoding="utf-8-sig")
+        fmt = args.format or detect_format(args.file)
+    try:
+        plan = plan_import(read_rows(f, fmt), catalog, args.tenant,
+                           registry.validate_tenant_id if registry else None)
+    except ImportFormatError as e:
+        raise CommandError(f"{args.file}: {e}")
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+    for error in plan.errors:
+        err.write(f"{args.file}: {error}\n")
+    if args.dry_run:
+        changed = sum(len(statuses) for statuses, _ in plan.changes.values())
+    elif registry is not None:
+        changed = apply_plan(plan, registry.get, args.actor)
+        registry.close()
+    else:
+        store = open_assessment(args, catalog)
+        changed = apply_plan(plan, lambda tenant_id: store, args.actor)
+    out.write(f"{plan.valid_rows} of {plan.rows} rows valid; "
+              f"{'would update' if args.dry_run else 'updated'} {changed} "
+              f"controls in {len(plan.changes)} assessment(s)\n")
+    return EXIT_ERROR if plan.errors else EXIT_OK
+
+
+def _history(store):
+    if store.history is None:
+        raise CommandError("status history is disabled (ISO27001_HISTORY=0)")
+    return store.history
+
+
+def cmd_history(args, catalog, out, err):
+    control_id = None
+    if args.control_id:
+        control_id = resolve_control(catalog, args.control_id)
+    transitions = _history(open_assessment(args, catalog)).transitions(
+        control_id, args.since, args.until, args.limit)
+    if args.format == "json":
+        json.dump([transition.as_dict() for transition in transitions], out,
+                  indent=2)
+        out.write("\n")
+        return
+    for transition in transitions:
+        out.write(f"{transition.when:%Y-%m-%d %H:%M:%S}\t"
+                  f"{transition.control_id}\t{transition.old.value} -> "
+                  f"{transition.new.value}\t{transition.actor or ''}\n")
+
+
+def cmd_export(args, catalog, out, err):
+    f = out
+    if args.output:
+        f = open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        if args.view == "trend":
+            export_trend(catalog, _history(open_assessment(args, catalog)), f,
+                         args.format, args.period, args.since, args.until)
+        elif args.tenants and not args.tenant:
+            registry = open_registry(args, catalog)
+            try:
+                assessments = ((tenant_id,
+                                registry.get(tenant_id).snapshot())
+                               for tenant_id in registry.tenants())
+                export_portfolio(args.view, catalog, assessments, f,
+                                 args.format)
+            finally:
+                registry.close()
+        else:
+            export_view(args.view, catalog,
+                        open_assessment(args, catalog).snapshot(), f,
+                        args.format)
+    finally:
+        if f is not out:
+            f.close()
+
+
+COMMANDS = {
+    "list": cmd_list,
+    "show": cmd_show,
+    "set-status": cmd_set_status,
+    "report": cmd_report,
+    "roadmap": cmd_roadmap,
+    "import": cmd_import,
+    "export": cmd_export,
+    "history": cmd_history,
+}
+
+
+_parser = None
+
+
+def main(argv=None, out=None, err=None):
+    global _parser
+    out = out or sys.stdout
+    err = err or sys.stderr
+    if _parser is None:
+        _parser = build_parser()
+    try:
+        # argparse prints help and usage errors itself; send them along.
+        with redirect_stdout(out), redirect_stderr(err):
+            args = _parser.parse_args(argv)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else EXIT_USAGE
+
+    try:
+        status = COMMANDS[args.command](args, default_catalog(), out, err)
+    except BrokenPipeError:
+        # The reader (e.g. ``| head``) went away; stop quietly.
+        if out is sys.stdout:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+        return EXIT_ERROR
+    except (CommandError, OSError, ValueError) as e:
+        err.write(f"error: {e}\n")
+        return EXIT_ERROR
+    return status or EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
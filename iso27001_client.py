@@ -0,0 +1,165 @@
+# Kept to cheap imports so forwarding a command costs little more than
+# interpreter startup: requests and responses are marshal-encoded (json
+# alone would pull in re and enum), and the assistant's own modules are
+# only imported when a command has to run locally.
+import marshal
+import os
+import socket
+import stat
+import sys
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "Main_ISO_ver1_1.py")
+# Environment variables that change how a command resolves its store.
+# ISO27001_HISTORY and ISO27001_RENDER_CACHE_BYTES are not among them:
+# the daemon's open stores and render cache keep the values it started
+# with.
+FORWARDED_ENV = ("ISO27001_BACKEND", "ISO27001_ACTOR")
+
+
+def default_socket_path():
+    path = os.environ.get("ISO27001_DAEMON_SOCKET")
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        # Already private to this user.
+        return os.path.join(runtime_dir, "iso27001.sock")
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join("/tmp", f"iso27001-{uid}", "daemon.sock")
+
+
+def socket_is_private(path):
+    """Whether ``path`` is a socket owned by, and open only to, this user.
+
+    Anyone else could have put a listener there to read the commands sent
+    to it and answer them, so the client only connects to such a socket.
+    """
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return (stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+            and not st.st_mode & 0o077)
+
+
+def remove_stale_socket(path, owner="A server"):
+    """Unlink a Unix socket left behind by a process that has exited.
+
+    Raises ``OSError`` if something is still listening on ``path``.
+    """
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise OSError(f"{owner} is already listening on {path}")
+    finally:
+        probe.close()
+
+
+def forward(argv, socket_path=None, timeout=60.0):
+    """Run ``argv`` in the daemon; return ``(code, out, err)`` or None.
+
+    None means no daemon is listening, so the command should run locally.
+    Once the request is sent, a daemon that stops answering within
+    ``timeout`` seconds or drops the connection is reported as a failure
+    instead, since it may already have applied the command.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    path = socket_path or default_socket_path()
+    if not os.path.exists(path):
+        return None
+    if not socket_is_private(path):
+        sys.stderr.write(f"warning: not using daemon socket {path}: it is "
+                         f"not a socket private to this user\n")
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    request = {"argv": list(argv), "cwd": os.getcwd(),
+               "env": {name: os.environ[name] for name in FORWARDED_ENV
+                       if name in os.environ}}
+    with sock:
+        chunks = []
+        try:
+            sock.sendall(marshal.dumps(request))
+            sock.shutdown(socket.SHUT_WR)
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        except socket.timeout:
+            return _unanswered(f"no answer from the daemon within "
+                               f"{timeout:g}s")
+        except OSError as e:
+            return _unanswered(f"lost the connection to the daemon ({e})")
+    # The daemon may still be running the command, or have run it before
+    # dying, so running it here as well could apply a change twice.
+    if not chunks:
+        return _unanswered("the daemon closed the connection without "
+                           "answering")
+    try:
+        response = marshal.loads(b"".join(chunks))
+        return response["code"], response["out"], response["err"]
+    except (EOFError, ValueError, KeyError, TypeError):
+        return _unanswered("the daemon's answer was cut short")
+
+
+def _unanswered(reason):
+    return 1, "", f"error: {reason}; the command may or may not have run\n"
+
+
+def spawn_daemon(socket_path=None):
+    import subprocess
+    command = [sys.executable, MAIN_SCRIPT, "--daemon"]
+    if socket_path:
+        command += ["--socket", socket_path]
+    subprocess.Popen(command, stdin=subprocess.DEVNULL,
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+
+
+def runs_locally(argv):
+    # The interactive menu and stdin imports need this process's terminal.
+    return not argv or ("import" in argv and "-" in argv)
+
+
+def main(argv=None):
+    """Run a ``Main_ISO_ver1_1.py`` command through the warm-start daemon.
+
+    Takes the same arguments as ``Main_ISO_ver1_1.py``.  If no daemon is
+    running the command runs in this process and a daemon is started in
+    the background for the next call (unless ``ISO27001_NO_DAEMON=1``).
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not runs_locally(argv):
+        result = forward(argv)
+        if result is not None:
+            code, out, err = result
+            sys.stdout.write(out)
+            sys.stderr.write(err)
+            return code
+        if os.environ.get("ISO27001_NO_DAEMON") != "1":
+            spawn_daemon()
+    sys.argv = [MAIN_SCRIPT] + list(argv)
+    sys.path.insert(0, os.path.dirname(MAIN_SCRIPT))
+    if argv:
+        from iso27001_cli import main as cli_main
+        return cli_main(argv)
+    import runpy
+    runpy.run_path(MAIN_SCRIPT, run_name="__main__")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import argparse
+import io
+import marshal
+import os
+import socketserver
+import sys
+
+from iso27001_catalog import default_catalog
+from iso27001_cli import main as cli_main
+from iso27001_client import (FORWARDED_ENV, default_socket_path,
+                             remove_stale_socket)
+
+DEFAULT_IDLE_TIMEOUT = 600.0
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # One marshal-encoded request per connection, ended by the client
+        # shutting down its side; see iso27001_client.forward.
+        try:
+            request = marshal.loads(self.rfile.read())
+            response = self.server.run(request["argv"], request["cwd"],
+                                       request.get("env", {}))
+        except (ValueError, EOFError, KeyError, TypeError) as e:
+            response = {"code": 2, "out": "",
+                        "err": f"error: bad daemon request: {e}\n"}
+        self.wfile.write(marshal.dumps(response))
+
+
+class CommandDaemon(socketserver.UnixStreamServer):
+    """Runs CLI commands for ``iso27001_client`` in a warm process.
+
+    The catalog, open stores and the render cache survive between
+    commands, so a forwarded ``show`` or ``report`` skips interpreter
+    startup and catalog loading.  Requests are handled one at a time in
+    the client's working directory and exit after ``idle_timeout`` seconds
+    without one.
+    """
+
+    def __init__(self, path, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, mode=0o700)
+        remove_stale_socket(path, "A daemon")
+        self.timeout = idle_timeout
+        self.idle = False
+        self.commands = 0
+        old_umask = os.umask(0o177)  # socket readable by this user only
+        try:
+            super().__init__(path, _CommandHandler)
+        finally:
+            os.umask(old_umask)
+
+    def run(self, argv, cwd, env):
+        out = io.StringIO()
+        err = io.StringIO()
+        saved_cwd = os.getcwd()
+        saved_env = {name: os.environ.get(name) for name in FORWARDED_ENV}
+        try:
+            os.chdir(cwd)
+            for name in FORWARDED_ENV:
+                if name in env:
+                    os.environ[name] = env[name]
+                else:
+                    os.environ.pop(name, None)
+            code = cli_main(argv, out=out, err=err)
+        except OSError as e:
+            code = 1
+            err.write(f"error: {e}\n")
+        except Exception as e:
+            # Always answer: on a dropped connection the client cannot tell
+            # whether the command ran.
+            code = 1
+            err.write(f"error: {type(e).__name__}: {e}\n")
+        finally:
+            os.chdir(saved_cwd)
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+        self.commands += 1
+        return {"code": code, "out": out.getvalue(), "err": err.getvalue()}
+
+    def handle_timeout(self):
+        self.idle = True
+
+    def serve_until_idle(self):
+        try:
+            while not self.idle:
+                self.handle_request()
+        finally:
+            self.server_close()
+            try:
+                os.unlink(self.server_address)
+            except OSError:
+                pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="Main_ISO_ver1_1.py --daemon",
+        description="Keep the assistant loaded and serve iso27001_client.py.")
+    parser.add_argument("--socket", default=None,
+                        help="Unix socket path (default: $ISO27001_DAEMON_SOCKET, "
+                             "iso27001.sock in $XDG_RUNTIME_DIR or "
+                             "/tmp/iso27001-<uid>/daemon.sock)")
+    parser.add_argument("--idle-timeout", type=float,
+                        default=DEFAULT_IDLE_TIMEOUT, metavar="SECONDS",
+                        help="exit after this long without a command "
+                             "(default: 600)")
+    args = parser.parse_args(argv)
+
+    default_catalog()  # load before the first command arrives
+    try:
+        daemon = CommandDaemon(args.socket or default_socket_path(),
+                               args.idle_timeout)
+    except OSError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    try:
+        daemon.serve_until_idle()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
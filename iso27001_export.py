@@ -0,0 +1,143 @@
+import csv
+import html
+import json
+
+from iso27001_reports import (compliance_counters, control_register,
+                              roadmap_summary, trend_fields, trend_rows)
+from iso27001_store import ControlStatus
+
+STATUS_FIELDS = tuple(status.name for status in ControlStatus)
+
+VIEW_FIELDS = {
+    "report": ("scope", "name", "total") + STATUS_FIELDS + ("implemented_pct",),
+    "register": ("control", "title", "domain", "status", "note"),
+    "roadmap": ("phase", "name", "controls", "implemented", "tasks"),
+}
+VIEW_TITLES = {
+    "report": "Compliance Report",
+    "register": "Control Register",
+    "roadmap": "ISO 27001 Implementation Roadmap",
+    "trend": "Compliance Trend",
+}
+FORMATS = ("csv", "jsonl", "html")
+
+HTML_STYLE = """\
+body{font-family:sans-serif;margin:2em;color:#222}
+table{border-collapse:collapse;width:100%}
+th,td{border:1px solid #ccc;padding:4px 8px;text-align:left;vertical-align:top}
+th{background:#f0f0f0}
+tr:nth-child(even) td{background:#fafafa}
+td{white-space:pre-wrap}"""
+
+
+def _count_row(scope, name, counts):
+    total = sum(counts.get(status, 0) for status in STATUS_FIELDS)
+    row = {"scope": scope, "name": name, "total": total}
+    for status in STATUS_FIELDS:
+        row[status] = counts.get(status, 0)
+    row["implemented_pct"] = (round(row["IMPLEMENTED"] / total * 100, 1)
+                              if total else 0.0)
+    return row
+
+
+def report_rows(catalog, snapshot):
+    """Yield the report's status counts overall, per domain and per phase."""
+    counters = compliance_counters(catalog, snapshot)
+    yield _count_row("overall", "All controls", counters['status'])
+    for domain, counts in counters['domain'].items():
+        yield _count_row("domain", domain, counts)
+    for phase in catalog.phases:
+        yield _count_row("phase", f"Phase {phase['phase']}: {phase['name']}",
+                         counters['phase'].get(str(phase['phase']), {}))
+
+
+def roadmap_rows(catalog, snapshot=None):
+    for phase in roadmap_summary(catalog, snapshot):
+        counts = phase.get("status_counts")
+        yield {"phase": phase["phase"], "name": phase["name"],
+               "controls": len(phase["controls"]),
+               "implemented": counts.get("IMPLEMENTED", 0) if counts else "",
+               "tasks": "; ".join(phase["tasks"])}
+
+
+VIEW_ROWS = {
+    "report": report_rows,
+    "register": control_register,
+    "roadmap": roadmap_rows,
+}
+
+
+def view_rows(view, catalog, snapshot):
+    return VIEW_ROWS[view](catalog, snapshot)
+
+
+def portfolio_rows(view, catalog, assessments):
+    """Yield ``view`` rows for every ``(tenant ID, snapshot)`` pair.
+
+    ``assessments`` is consumed lazily, so exporting a whole tenant
+    directory holds one assessment in memory at a time.
+    """
+    for tenant_id, snapshot in assessments:
+        for row in view_rows(view, catalog, snapshot):
+            tenant_row = {"tenant": tenant_id}
+            tenant_row.update(row)
+            yield tenant_row
+
+
+def write_csv(rows, f, fields):
+    writer = csv.DictWriter(f, fields, lineterminator="\n")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+
+
+def write_jsonl(rows, f, fields=None):
+    for row in rows:
+        f.write(json.dumps(row) + "\n")
+
+
+def write_html(rows, f, fields, title="Export"):
+    """Write a standalone HTML page; rows are streamed into one table."""
+    title = html.escape(title)
+    f.write(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+            f"<title>{title}</title>\n<style>\n{HTML_STYLE}\n</style>"
+            f"</head>\n<body>\n<h1>{title}</h1>\n<table>\n<tr>")
+    f.write("".join(f"<th>{html.escape(field)}</th>" for field in fields))
+    f.write("</tr>\n")
+    for row in rows:
+        f.write("<tr>" + "".join(
+            f"<td>{html.escape(str(row.get(field, '')))}</td>"
+            for field in fields) + "</tr>\n")
+    f.write("</table>\n</body></html>\n")
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "html": write_html}
+
+
+def write_rows(rows, f, fmt, fields, title=None):
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    if fmt == "html":
+        write_html(rows, f, fields, title or "Export")
+    else:
+        WRITERS[fmt](rows, f, fields)
+
+
+def export_view(view, catalog, snapshot, f, fmt):
+    """Write one assessment's ``view`` to the file-like object ``f``."""
+    write_rows(view_rows(view, catalog, snapshot), f, fmt, VIEW_FIELDS[view],
+               VIEW_TITLES[view])
+
+
+def export_portfolio(view, catalog, assessments, f, fmt):
+    """Write ``view`` for many assessments, with a leading tenant column."""
+    write_rows(portfolio_rows(view, catalog, assessments), f, fmt,
+               ("tenant",) + VIEW_FIELDS[view],
+               f"{VIEW_TITLES[view]} (portfolio)")
+
+
+def export_trend(catalog, history, f, fmt, period="week", since=None,
+                 until=None):
+    """Write the per-period burn-down series of one assessment's history."""
+    write_rows(trend_rows(catalog, history, period, since, until), f, fmt,
+               trend_fields(catalog), f"{VIEW_TITLES['trend']} ({period})")
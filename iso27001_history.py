@@ -0,0 +1,688 @@
+import functools
+import getpass
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from iso27001_portfolio import (CODE_STATUSES, STATUS_CODES, PackedStatuses,
+                                StatusLayout)
+from iso27001_store import ControlStatus
+
+logger = logging.getLogger(__name__)
+
+HISTORY_SUFFIX = ".history.db"
+CHECKPOINT_INTERVAL = 256
+RECOVERED_ACTOR = "(recovered)"
+FOLD_DELAY = 0.05
+PERIODS = ("day", "week")
+NAME_CODES = {status.name: code for status, code in STATUS_CODES.items()}
+CODE_NAMES = {code: name for name, code in NAME_CODES.items()}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transitions (
+    seq INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    control_id TEXT NOT NULL,
+    old TEXT NOT NULL,
+    new TEXT NOT NULL,
+    actor TEXT,
+    version INTEGER
+);
+CREATE INDEX IF NOT EXISTS transitions_by_time ON transitions (ts);
+CREATE INDEX IF NOT EXISTS transitions_by_control
+    ON transitions (control_id, ts);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    seq INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    catalog TEXT NOT NULL,
+    statuses BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS checkpoints_by_time ON checkpoints (ts);
+CREATE TABLE IF NOT EXISTS recorded (
+    catalog TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollup_state (
+    catalog TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    statuses BLOB NOT NULL,
+    counts TEXT NOT NULL,
+    in_progress TEXT NOT NULL,
+    checkpoint_seq INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollup_counts (
+    catalog TEXT NOT NULL,
+    period TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    counts TEXT NOT NULL,
+    PRIMARY KEY (catalog, period, bucket)
+);
+CREATE TABLE IF NOT EXISTS rollup_durations (
+    catalog TEXT NOT NULL,
+    period TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    exits INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (catalog, period, bucket)
+);
+"""
+ROLLUP_TABLES = ("rollup_state", "rollup_counts", "rollup_durations",
+                 "in_progress_since")
+
+
+def default_actor():
+    return os.environ.get("ISO27001_ACTOR") or _login_name()
+
+
+@functools.lru_cache(maxsize=None)
+def _login_name():
+    try:
+        return getpass.getuser()
+    except Exception:
+        return None
+
+
+def _entry_time(entry):
+    try:
+        return datetime.fromisoformat(entry['last_updated']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return time.time()
+
+
+def bucket_start(timestamp, period):
+    """First day (local time) of the ``period`` containing ``timestamp``."""
+    day = datetime.fromtimestamp(timestamp).date()
+    if period == "week":
+        day -= timedelta(days=day.weekday())
+    elif period != "day":
+        raise ValueError(f"Unknown trend period: {period!r}")
+    return day
+
+
+def to_timestamp(when):
+    """Accept an epoch float, a datetime or an ISO 8601 string.
+
+    A bare date such as "2026-03-01" means the end of that day, i.e. the
+    posture "on" that date.
+    """
+    if isinstance(when, (int, float)):
+        return float(when)
+    if isinstance(when, str):
+        text = when.strip()
+        parsed = datetime.fromisoformat(text)
+        if len(text) == 10:
+            parsed = parsed.replace(hour=23, minute=59, second=59,
+                                    microsecond=999999)
+        when = parsed
+    return when.timestamp()
+
+
+class Transition:
+    __slots__ = ('seq', 'timestamp', 'control_id', 'old', 'new', 'actor')
+
+    def __init__(self, seq, timestamp, control_id, old, new, actor):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.control_id = control_id
+        self.old = ControlStatus[old]
+        self.new = ControlStatus[new]
+        self.actor = actor
+
+    @property
+    def when(self):
+        return datetime.fromtimestamp(self.timestamp)
+
+    def as_dict(self):
+        return {"seq": self.seq, "timestamp": str(self.when),
+                "control": self.control_id, "old": self.old.name,
+                "new": self.new.name, "actor": self.actor}
+
+
+class TrendBucket:
+    """Rolled-up counts at the end of one day or week."""
+
+    __slots__ = ('start', 'statuses', 'domains', 'in_progress_exits',
+                 'in_progress_seconds')
+
+    def __init__(self, start, counts, exits, seconds):
+        self.start = start
+        self.statuses = {status.name: counts[status.name]
+                         for status in ControlStatus}
+        self.domains = {name[len("domain:"):]: count
+                        for name, count in counts.items()
+                        if name.startswith("domain:")}
+        self.in_progress_exits = exits
+        self.in_progress_seconds = seconds
+
+
+class HistoryStore:
+    """Append-only log of status transitions for one assessment.
+
+    Rows are (control, old, new, timestamp, actor), stamped with the state
+    version of their commit, in a SQLite file next to the assessment and
+    indexed by time and by control.  Stores keep each commit's entry with
+    the commit itself and hand it over afterwards; ``sync`` appends them
+    in version order, so recording order is commit order.  Timestamps never
+    decrease in recording order (a writer whose clock lags is clamped to
+    the latest recorded time), so the transitions up to any moment are a
+    prefix of the log.  Every ``CHECKPOINT_INTERVAL`` transitions the full
+    status vector is stored packed, one byte per control; ``statuses_at``
+    starts from the nearest checkpoint and replays at most one interval.
+    The statuses found when the history is created become checkpoint 0,
+    so assessments that predate the history keep their earlier progress.
+    """
+
+    def __init__(self, path, catalog):
+        self.path = path
+        self.catalog = catalog
+        self.layout = StatusLayout.from_catalog(catalog)
+        self.domains = {control_id: catalog.controls[control_id]['domain']
+                        for control_id in self.layout.control_ids}
+        self.source = None
+        self._conn = None
+        self._lock = threading.RLock()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._synced = threading.Condition(self._pending_lock)
+        self._syncing = 0
+
+    def _connection(self):
+        # Callers hold self._lock; the connection is shared by the threads
+        # of one process and reopened after close().
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0,
+                                   isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            state_columns = [row[1] for row in
+                             conn.execute("PRAGMA table_info(rollup_state)")]
+            if state_columns and "checkpoint_seq" not in state_columns:
+                # Rollups are derived from the log; rebuild older layouts.
+                for table in ROLLUP_TABLES:
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.executescript(SCHEMA)
+            columns = [row[1] for row in
+                       conn.execute("PRAGMA table_info(transitions)")]
+            if "version" not in columns:
+                conn.execute("ALTER TABLE transitions ADD COLUMN version INTEGER")
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        """Append the entries still queued in this process, then close."""
+        try:
+            self.sync(catch_up=False)
+        except Exception:
+            logger.exception("Could not update status history in %s",
+                             self.path)
+        with self._pending_lock:
+            while self._syncing:
+                # Let the background thread finish, so nothing reopens
+                # the database after close() returns.
+                self._synced.wait()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def submit(self, entry):
+        """Queue one commit's entry for the log, after the store's lock.
+
+        ``entry`` is the commit as the store wrote it: its ``version``,
+        ``last_updated``, new ``statuses`` and, for this log, the ``old``
+        status of each control and the ``actor``.  Appending happens on a
+        background thread, so commits never wait on the history database.
+        """
+        with self._pending_lock:
+            self._pending[entry['version']] = entry
+        _folder.schedule(self)
+
+    def sync(self, catch_up=True):
+        """Append committed changes the log does not have yet, then fold.
+
+        Without ``catch_up`` (the background thread), entries submitted in
+        this process are appended directly when they continue the log.
+        Otherwise the ``source`` store reports its current state and the
+        entries it still holds (the JSON journal or the SQLite queue),
+        which are appended in version order; whatever they no longer cover
+        (history was disabled, the journal was compacted, the state was
+        imported) is recorded as ``RECOVERED_ACTOR`` transitions, so the
+        log always replays to the stored state.  Readers call this first
+        and so see every commit.
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            self._syncing += 1
+        try:
+            self._sync(pending, catch_up)
+        finally:
+            with self._pending_lock:
+                self._syncing -= 1
+                self._synced.notify_all()
+
+    def _sync(self, pending, catch_up):
+        if not catch_up and not pending:
+            return
+        if not os.path.isdir(os.path.dirname(self.path) or "."):
+            return
+        with self._lock:
+            recorded = self._recorded(self._connection())
+        chain = {version: entry for version, entry in pending.items()
+                 if recorded is None or version > recorded}
+        if not catch_up and not chain:
+            return
+        head = None
+        if (catch_up or recorded is None or not chain
+                or sorted(chain) != list(range(recorded + 1,
+                                               recorded + 1 + len(chain)))):
+            if self.source is None:
+                if not chain:
+                    return
+            else:
+                # Outside self._lock: the store takes its own lock, and
+                # stores may call sync() while holding that.
+                version, statuses, entries = self.source.history_entries(
+                    recorded)
+                chain.update((entry['version'], entry) for entry in entries)
+                head = (version, statuses)
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                recorded = self._append(conn, chain, head)
+                self._update_rollups(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        if self.source is not None and recorded is not None:
+            self.source.history_recorded(recorded)
+
+    def _recorded(self, conn):
+        row = conn.execute("SELECT version FROM recorded WHERE catalog = ?",
+                           (self.catalog.key,)).fetchone()
+        return row[0] if row else None
+
+    def _append(self, conn, chain, head):
+        recorded = self._recorded(conn)
+        if head is None:
+            if recorded is None or not chain:
+                return recorded
+            start, end = recorded, max(chain)
+            if end <= start or sorted(v for v in chain if v > start) != list(
+                    range(start + 1, end + 1)):
+                # Another thread got here first; the store still holds
+                # these entries for the next sync.
+                return recorded
+        else:
+            # Walk back from the stored state over the entries leading up
+            # to it, to where the log ends or as far as they reach.
+            end, statuses = head
+            if recorded is not None and end <= recorded:
+                return recorded
+            statuses = dict(statuses)
+            start = end
+            while start in chain and (recorded is None or start > recorded):
+                statuses.update(chain[start]['old'])
+                start -= 1
+        rows = []
+        if head is not None and start != recorded:
+            timestamp = (_entry_time(chain[start + 1]) if start < end
+                         else time.time())
+            rows = self._recovered(conn, statuses, start, timestamp)
+        for version in range(start + 1, end + 1):
+            entry = chain[version]
+            timestamp = _entry_time(entry)
+            old = entry['old']
+            rows.extend(
+                (timestamp, control_id, old.get(control_id, "NOT_STARTED"),
+                 new, entry.get('actor'), version)
+                for control_id, new in entry['statuses'].items()
+                if old.get(control_id, "NOT_STARTED") != new)
+        if rows:
+            latest = conn.execute(
+                "SELECT MAX(ts) FROM transitions").fetchone()[0] or 0.0
+            clamped = []
+            for timestamp, control_id, old, new, actor, version in rows:
+                latest = max(latest, timestamp)
+                clamped.append((latest, control_id, old, new, actor, version))
+            conn.executemany(
+                "INSERT INTO transitions (ts, control_id, old, new, actor, "
+                "version) VALUES (?, ?, ?, ?, ?, ?)", clamped)
+        if end != recorded:
+            conn.execute("INSERT OR REPLACE INTO recorded (catalog, version) "
+                         "VALUES (?, ?)", (self.catalog.key, end))
+        return end
+
+    def _recovered(self, conn, before, version, timestamp):
+        """Transitions taking the log's latest statuses to ``before``."""
+        packed = PackedStatuses.from_statuses(
+            self.layout, {control_id: ControlStatus[name]
+                          for control_id, name in before.items()})
+        has_checkpoint = conn.execute(
+            "SELECT 1 FROM checkpoints WHERE catalog = ? AND seq = 0",
+            (self.catalog.key,)).fetchone()
+        has_transitions = conn.execute(
+            "SELECT 1 FROM transitions LIMIT 1").fetchone()
+        if not has_checkpoint and not has_transitions:
+            # A new history starts from the assessment as it stands, so
+            # earlier progress is kept without inventing transitions.
+            conn.execute(
+                "INSERT INTO checkpoints (seq, ts, catalog, statuses) "
+                "VALUES (0, 0, ?, ?)", (self.catalog.key, bytes(packed.buffer)))
+            return []
+        logged = self._update_rollups(conn)
+        return [(timestamp, control_id, CODE_STATUSES[old].name,
+                 CODE_STATUSES[new].name, RECOVERED_ACTOR, version)
+                for control_id, old, new in zip(self.layout.control_ids,
+                                                logged.buffer, packed.buffer)
+                if old != new]
+
+    def _last_checkpoint(self, conn, before=None):
+        query = ("SELECT seq, statuses FROM checkpoints WHERE catalog = ?")
+        params = [self.catalog.key]
+        if before is not None:
+            query += " AND ts <= ?"
+            params.append(before)
+        row = conn.execute(query + " ORDER BY seq DESC LIMIT 1",
+                           params).fetchone()
+        if row is None:
+            return 0, PackedStatuses(self.layout)
+        return row[0], PackedStatuses(self.layout, row[1])
+
+    def _replay(self, conn, packed, after_seq, until_seq):
+        offsets = self.layout.offsets
+        for control_id, new in conn.execute(
+                "SELECT control_id, new FROM transitions "
+                "WHERE seq > ? AND seq <= ? ORDER BY seq",
+                (after_seq, until_seq)):
+            offset = offsets.get(control_id)
+            if offset is not None:
+                packed.buffer[offset] = STATUS_CODES[ControlStatus[new]]
+        return packed
+
+    def packed_at(self, when):
+        """Status vector (``PackedStatuses``) as of ``when``."""
+        timestamp = to_timestamp(when)
+        self.sync()
+        if not self.exists():
+            return PackedStatuses(self.layout)
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT seq FROM transitions WHERE ts <= ? "
+                "ORDER BY ts DESC, seq DESC LIMIT 1", (timestamp,)).fetchone()
+            if row is None:
+                # Nothing changed yet; checkpoint 0 holds the statuses the
+                # history started from.
+                return self._last_checkpoint(conn, timestamp)[1]
+            checkpoint_seq, packed = self._last_checkpoint(conn, timestamp)
+            return self._replay(conn, packed, checkpoint_seq, row[0])
+
+    def statuses_at(self, when):
+        """``control ID -> ControlStatus`` as of ``when``; controls that
+        were Not Started at the time are omitted."""
+        return self.packed_at(when).to_statuses()
+
+    def transitions(self, control_id=None, since=None, until=None,
+                    limit=None):
+        """Yield recorded ``Transition`` objects in recording order."""
+        self.sync()
+        if not self.exists():
+            return
+        clauses = []
+        params = []
+        if control_id is not None:
+            clauses.append("control_id = ?")
+            params.append(control_id)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(to_timestamp(since))
+        if until is not None:
+            clauses.append("ts <= ?")
+            params.append(to_timestamp(until))
+        query = "SELECT seq, ts, control_id, old, new, actor FROM transitions"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY seq"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._connection().execute(query, params).fetchall()
+        for row in rows:
+            yield Transition(*row)
+
+    def _update_rollups(self, conn):
+        """Fold transitions not yet seen into the rollups and checkpoints.
+
+        ``rollup_state`` keeps, as of the last folded transition, the
+        status vector, the rolled-up counts and when each control entered
+        In Progress, so each append only visits its own rows.  A checkpoint
+        of the vector is stored every ``CHECKPOINT_INTERVAL`` transitions.
+        A history whose rollups are missing is caught up on first use.
+        Returns the current status vector.
+        """
+        key = self.catalog.key
+        row = conn.execute(
+            "SELECT seq, statuses, counts, in_progress, checkpoint_seq "
+            "FROM rollup_state WHERE catalog = ?", (key,)).fetchone()
+        if row is None:
+            checkpoint_seq, packed = self._last_checkpoint(conn)
+            if checkpoint_seq:
+                # Rollups over the whole log: start again from checkpoint 0.
+                start = conn.execute(
+                    "SELECT statuses FROM checkpoints "
+                    "WHERE catalog = ? AND seq = 0", (key,)).fetchone()
+                packed = PackedStatuses(self.layout,
+                                        start[0] if start else None)
+            seq = 0
+            counts = self._rollup_counts(packed)
+            since = {}
+        else:
+            seq, checkpoint_seq = row[0], row[4]
+            packed = PackedStatuses(self.layout, row[1])
+            counts = json.loads(row[2])
+            since = json.loads(row[3])
+        transitions = conn.execute(
+            "SELECT seq, ts, control_id, new FROM transitions "
+            "WHERE seq > ? ORDER BY seq", (seq,)).fetchall()
+        if not transitions and row is not None:
+            return packed
+
+        offsets = self.layout.offsets
+        domains = self.domains
+        in_progress = STATUS_CODES[ControlStatus.IN_PROGRESS]
+        implemented = STATUS_CODES[ControlStatus.IMPLEMENTED]
+        bucket_counts = {}
+        durations = {}
+        buckets = ()
+        day_start = day_end = None
+        changed = False
+        for seq, timestamp, control_id, new in transitions:
+            offset = offsets.get(control_id)
+            old_code = new_code = None
+            if offset is not None:
+                old_code = packed.buffer[offset]
+                new_code = NAME_CODES[new]
+            if old_code != new_code:
+                if day_start is None or not day_start <= timestamp < day_end:
+                    # Counts at the end of a bucket are the counts before
+                    # the first change after it.
+                    if changed:
+                        for bucket in buckets:
+                            bucket_counts[bucket] = dict(counts)
+                    day = bucket_start(timestamp, "day")
+                    day_start, day_end = (
+                        datetime.combine(start, datetime.min.time()).timestamp()
+                        for start in (day, day + timedelta(days=1)))
+                    buckets = [(period, bucket_start(timestamp,
+                                                     period).isoformat())
+                               for period in PERIODS]
+                changed = True
+                packed.buffer[offset] = new_code
+                counts[CODE_NAMES[old_code]] -= 1
+                counts[CODE_NAMES[new_code]] += 1
+                if implemented in (old_code, new_code):
+                    counts["domain:" + domains[control_id]] += (
+                        1 if new_code == implemented else -1)
+                if new_code == in_progress:
+                    since[control_id] = timestamp
+                elif old_code == in_progress and control_id in since:
+                    elapsed = timestamp - since.pop(control_id)
+                    for bucket in buckets:
+                        exits, seconds = durations.get(bucket, (0, 0.0))
+                        durations[bucket] = (exits + 1, seconds + elapsed)
+            if seq - checkpoint_seq >= CHECKPOINT_INTERVAL:
+                conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints "
+                    "(seq, ts, catalog, statuses) VALUES (?, ?, ?, ?)",
+                    (seq, timestamp, key, bytes(packed.buffer)))
+                checkpoint_seq = seq
+        if changed:
+            for bucket in buckets:
+                bucket_counts[bucket] = dict(counts)
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO rollup_counts "
+            "(catalog, period, bucket, counts) VALUES (?, ?, ?, ?)",
+            [(key, period, bucket, json.dumps(bucket_counts[period, bucket]))
+             for period, bucket in bucket_counts])
+        for (period, bucket), (exits, seconds) in durations.items():
+            updated = conn.execute(
+                "UPDATE rollup_durations SET exits = exits + ?, "
+                "seconds = seconds + ? "
+                "WHERE catalog = ? AND period = ? AND bucket = ?",
+                (exits, seconds, key, period, bucket))
+            if not updated.rowcount:
+                conn.execute(
+                    "INSERT INTO rollup_durations "
+                    "(catalog, period, bucket, exits, seconds) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, period, bucket, exits, seconds))
+        conn.execute(
+            "INSERT OR REPLACE INTO rollup_state (catalog, seq, statuses, "
+            "counts, in_progress, checkpoint_seq) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, seq, bytes(packed.buffer), json.dumps(counts),
+             json.dumps(since), checkpoint_seq))
+        return packed
+
+    def _rollup_counts(self, packed):
+        counts = {status.name: packed.count(status) for status in ControlStatus}
+        implemented = STATUS_CODES[ControlStatus.IMPLEMENTED]
+        for domain in self.domains.values():
+            counts.setdefault("domain:" + domain, 0)
+        for control_id, code in zip(self.layout.control_ids, packed.buffer):
+            if code == implemented:
+                counts["domain:" + self.domains[control_id]] += 1
+        return counts
+
+    def rollups(self, period="week", since=None, until=None):
+        """Yield one ``TrendBucket`` per ``period`` from ``since`` to ``until``.
+
+        Counts are as of the end of each bucket and carried forward over
+        buckets without changes; ``until`` defaults to today.  Reads the
+        precomputed rollups, bringing them up to date first if needed.
+        """
+        if not self.exists():
+            return
+        step = timedelta(days=7 if period == "week" else 1)
+        first = (None if since is None
+                 else bucket_start(to_timestamp(since), period))
+        last = bucket_start(time.time() if until is None
+                            else to_timestamp(until), period)
+        self.sync()
+        with self._lock:
+            conn = self._connection()
+            key = self.catalog.key
+            rows = conn.execute(
+                "SELECT bucket, counts FROM rollup_counts "
+                "WHERE catalog = ? AND period = ? AND bucket <= ? "
+                "ORDER BY bucket", (key, period, last.isoformat())).fetchall()
+            durations = {bucket: (exits, seconds) for bucket, exits, seconds
+                         in conn.execute(
+                             "SELECT bucket, exits, seconds "
+                             "FROM rollup_durations "
+                             "WHERE catalog = ? AND period = ?",
+                             (key, period))}
+        if not rows:
+            return
+
+        counts_by_bucket = {date.fromisoformat(bucket): json.loads(counts)
+                            for bucket, counts in rows}
+        day = date.fromisoformat(rows[0][0])
+        counts = None
+        if first is not None and first > day:
+            earlier = [bucket for bucket in counts_by_bucket if bucket < first]
+            counts = counts_by_bucket[max(earlier)] if earlier else None
+            day = first
+        while day <= last:
+            counts = counts_by_bucket.get(day, counts)
+            exits, seconds = durations.get(day.isoformat(), (0, 0.0))
+            yield TrendBucket(day, counts, exits, seconds)
+            day += step
+
+
+class _Folder:
+    """One background thread syncing submitted entries into their logs.
+
+    Commits only queue their entry; the log, the derived rollups and the
+    checkpoints follow shortly after, and readers sync whatever is still
+    pending before using them.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.errors = 0
+
+    def schedule(self, history):
+        with self._lock:
+            self._pending[history.path, history.catalog.key] = history
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="iso27001-history-fold",
+                    daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            # Let a burst of commits land before folding them together.
+            time.sleep(FOLD_DELAY)
+            self._wake.clear()
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            for history in pending.values():
+                try:
+                    history.sync(catch_up=False)
+                except Exception:
+                    self.errors += 1
+                    logger.exception("Could not update status history in %s",
+                                     history.path)
+
+
+_folder = _Folder()
+_histories = {}
+_histories_lock = threading.Lock()
+
+
+def history_for(data_file, catalog):
+    """The process-wide ``HistoryStore`` of the assessment at ``data_file``."""
+    path = os.path.abspath(data_file) + HISTORY_SUFFIX
+    key = (path, catalog.key)
+    history = _histories.get(key)
+    if history is None:
+        with _histories_lock:
+            history = _histories.setdefault(key, HistoryStore(path, catalog))
+    return history
@@ -0,0 +1,236 @@
+import csv
+import json
+import os
+
+from iso27001_store import parse_status
+
+CONTROL_FIELDS = ('control_id', 'control')
+JSON_CHUNK_SIZE = 64 * 1024
+
+
+class ImportFormatError(ValueError):
+    """The import file itself is unreadable (bad header, broken JSON)."""
+
+
+class RowError:
+    __slots__ = ('line', 'message')
+
+    def __init__(self, line, message):
+        self.line = line
+        self.message = message
+
+    def __str__(self):
+        return f"line {self.line}: {self.message}"
+
+
+class ImportPlan:
+    """Validated changes grouped by tenant, plus every rejected row.
+
+    ``changes`` maps a tenant ID (None for a single assessment) to a
+    ``(statuses, notes)`` pair ready for ``AssessmentStore.commit``.  A
+    control listed twice for one tenant keeps its last row.
+    """
+
+    def __init__(self):
+        self.changes = {}
+        self.errors = []
+        self.rows = 0
+
+    def add(self, tenant_id, control_id, status, note):
+        statuses, notes = self.changes.setdefault(tenant_id, ({}, {}))
+        statuses[control_id] = status
+        if note is not None:
+            notes[control_id] = note
+
+    @property
+    def valid_rows(self):
+        return self.rows - len(self.errors)
+
+    def tenant_ids(self):
+        return sorted(self.changes, key=lambda tenant_id: tenant_id or "")
+
+
+def detect_format(path, head=""):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".json", ".jsonl"):
+        return "json"
+    return "json" if head.lstrip()[:1] in ("[", "{") else "csv"
+
+
+def read_rows(f, fmt):
+    """Yield ``(line number, row dict)`` from an open CSV or JSON file.
+
+    JSON Lines rows that do not decode are yielded as ``RowError``.
+    """
+    if fmt == "csv":
+        return _csv_rows(f)
+    if fmt == "json":
+        return _json_rows(f)
+    raise ValueError(f"Unknown import format: {fmt!r}")
+
+
+def _csv_rows(f):
+    reader = csv.DictReader(f)
+    fields = [name.strip().lower() for name in reader.fieldnames or ()]
+    if not any(name in fields for name in CONTROL_FIELDS) or "status" not in fields:
+        raise ImportFormatError("CSV header must name a control_id and a "
+                                "status column")
+    reader.fieldnames = fields
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _json_rows(f):
+    """Stream objects from a JSON array or from JSON Lines.
+
+    JSON Lines are decoded one line at a time and an array one object at a
+    time from fixed-size chunks, so memory stays proportional to a single
+    row rather than to the whole file.  A line that is not valid JSON is
+    yielded as a ``RowError`` and the lines after it are still read.
+    """
+    line = 1
+    text = f.readline(JSON_CHUNK_SIZE)
+    while text and not text.strip():
+        if text.endswith(("\n", "\r")):
+            line += 1
+        text = f.readline(JSON_CHUNK_SIZE)
+    if text.lstrip().startswith("["):
+        yield from _json_array_rows(f, text, line)
+        return
+    if text and not text.endswith(("\n", "\r")):
+        text += _read_line(f)
+    while text:
+        text = text.strip()
+        if text:
+            try:
+                yield line, json.loads(text)
+            except json.JSONDecodeError as e:
+                yield line, RowError(line, f"invalid JSON ({e.msg})")
+        line += 1
+        text = _read_line(f)
+
+
+def _read_line(f):
+    parts = []
+    while True:
+        part = f.readline(JSON_CHUNK_SIZE)
+        parts.append(part)
+        if not part or part.endswith(("\n", "\r")):
+            return "".join(parts)
+
+
+def _json_array_rows(f, buffer, line):
+    decoder = json.JSONDecoder()
+    pos = buffer.index("[") + 1
+    eof = False
+    while True:
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                if buffer[pos] == "\n":
+                    line += 1
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            chunk = f.read(JSON_CHUNK_SIZE)
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            eof = not chunk
+        if pos >= len(buffer):
+            raise ImportFormatError(f"line {line}: unterminated JSON array")
+        if buffer[pos] == "]":
+            return
+
+        while True:
+            try:
+                row, end = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError as e:
+                if eof or not _cut_off(buffer, e):
+                    raise ImportFormatError(f"line {line}: invalid JSON "
+                                            f"({e.msg})")
+                chunk = f.read(JSON_CHUNK_SIZE)
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                eof = not chunk
+        yield line, row
+        line += buffer.count("\n", pos, end)
+        pos = end
+
+
+def _cut_off(buffer, error):
+    # An object split by a chunk boundary fails at the end of the buffer,
+    # in an unterminated string, or inside a short literal or \uXXXX
+    # escape; anything earlier is broken JSON and more input won't help.
+    return (error.msg.startswith("Unterminated string")
+            or len(buffer) - error.pos <= 6)
+
+
+def plan_import(rows, catalog, tenant_id=None, validate_tenant=None):
+    """Validate ``(line, row)`` pairs into an ``ImportPlan``.
+
+    Rows may carry a ``tenant`` column; rows without one belong to
+    ``tenant_id``.  ``validate_tenant`` (such as
+    ``TenantRegistry.validate_tenant_id``) is required for tenant rows.
+    """
+    plan = ImportPlan()
+    for line, row in rows:
+        plan.rows += 1
+        if isinstance(row, RowError):
+            plan.errors.append(row)
+            continue
+        if not isinstance(row, dict):
+            plan.errors.append(RowError(line, "expected an object with "
+                                              "control_id and status"))
+            continue
+        raw_id = next((row[name] for name in CONTROL_FIELDS
+                       if row.get(name)), None)
+        if raw_id is None:
+            plan.errors.append(RowError(line, "missing control_id"))
+            continue
+        control_id = catalog.normalize_id(str(raw_id))
+        if control_id is None:
+            plan.errors.append(RowError(line, f"unknown control ID {raw_id!r}"))
+            continue
+        try:
+            status = parse_status(str(row.get("status") or ""))
+        except ValueError as e:
+            plan.errors.append(RowError(line, str(e)))
+            continue
+
+        row_tenant = row.get("tenant") or tenant_id
+        if row.get("tenant"):
+            if validate_tenant is None:
+                plan.errors.append(RowError(line, "tenant rows need a tenant "
+                                                  "directory"))
+                continue
+            try:
+                validate_tenant(str(row_tenant))
+            except ValueError as e:
+                plan.errors.append(RowError(line, str(e)))
+                continue
+        elif validate_tenant is not None and tenant_id is None:
+            plan.errors.append(RowError(line, "missing tenant"))
+            continue
+
+        note = row.get("note")
+        plan.add(row_tenant, control_id, status,
+                 str(note) if note not in (None, "") else None)
+    return plan
+
+
+def apply_plan(plan, store_for, actor=None):
+    """Commit each tenant's changes with one ``commit`` call.
+
+    ``store_for`` maps a tenant ID from the plan to its store.  Tenants are
+    visited in sorted order so a ``TenantRegistry`` opens each one once.
+    Returns the number of controls changed.
+    """
+    changed = 0
+    for tenant_id in plan.tenant_ids():
+        statuses, notes = plan.changes[tenant_id]
+        store_for(tenant_id).commit(statuses=statuses, notes=notes or None,
+                                    actor=actor)
+        changed += len(statuses)
+    return changed
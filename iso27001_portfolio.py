@@ -0,0 +1,187 @@
+import json
+
+from iso27001_store import ControlStatus
+
+# Byte codes for the packed encoding.  These are persisted, so existing
+# codes must never be renumbered; new statuses get new codes.
+STATUS_CODES = {
+    ControlStatus.NOT_STARTED: 0,
+    ControlStatus.IN_PROGRESS: 1,
+    ControlStatus.IMPLEMENTED: 2,
+    ControlStatus.NOT_APPLICABLE: 3,
+}
+CODE_STATUSES = {code: status for status, code in STATUS_CODES.items()}
+
+PORTFOLIO_MAGIC = b"ISO27001-PORTFOLIO 1\n"
+
+
+class StatusLayout:
+    """Stable control ID <-> byte offset mapping derived from a catalog."""
+
+    def __init__(self, catalog_key, control_ids):
+        self.catalog_key = catalog_key
+        self.control_ids = tuple(control_ids)
+        self.offsets = {control_id: offset
+                        for offset, control_id in enumerate(self.control_ids)}
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        return cls(catalog.key, catalog.ids)
+
+    @property
+    def width(self):
+        return len(self.control_ids)
+
+    def __eq__(self, other):
+        return (isinstance(other, StatusLayout)
+                and self.catalog_key == other.catalog_key
+                and self.control_ids == other.control_ids)
+
+
+class PackedStatuses:
+    """One assessment as one status byte per control, in catalog order."""
+
+    __slots__ = ('layout', 'buffer')
+
+    def __init__(self, layout, buffer=None):
+        if buffer is None:
+            buffer = bytearray(layout.width)
+        elif len(buffer) != layout.width:
+            raise ValueError(f"Expected {layout.width} status bytes, "
+                             f"got {len(buffer)}")
+        self.layout = layout
+        self.buffer = bytearray(buffer)
+
+    @classmethod
+    def from_statuses(cls, layout, statuses):
+        """Pack a ``control ID -> ControlStatus`` mapping.
+
+        Controls missing from the layout are ignored, as they are by the
+        compliance counters.
+        """
+        packed = cls(layout)
+        offsets = layout.offsets
+        for control_id, status in statuses.items():
+            offset = offsets.get(control_id)
+            if offset is not None:
+                packed.buffer[offset] = STATUS_CODES[status]
+        return packed
+
+    @classmethod
+    def from_snapshot(cls, layout, snapshot):
+        return cls.from_statuses(layout, snapshot.statuses)
+
+    def __getitem__(self, control_id):
+        return CODE_STATUSES[self.buffer[self.layout.offsets[control_id]]]
+
+    def __setitem__(self, control_id, status):
+        self.buffer[self.layout.offsets[control_id]] = STATUS_CODES[status]
+
+    def count(self, status):
+        return self.buffer.count(STATUS_CODES[status])
+
+    def counts(self):
+        return {status: self.buffer.count(code)
+                for status, code in STATUS_CODES.items()}
+
+    def control_ids(self, status):
+        """Return the IDs of controls in ``status``, in catalog order."""
+        return [self.layout.control_ids[offset]
+                for offset in _find_all(self.buffer, STATUS_CODES[status])]
+
+    def to_statuses(self):
+        """Unpack into ``control ID -> ControlStatus``, omitting NOT_STARTED."""
+        return {self.layout.control_ids[offset]: CODE_STATUSES[code]
+                for offset, code in enumerate(self.buffer)
+                if code != STATUS_CODES[ControlStatus.NOT_STARTED]}
+
+
+class Portfolio:
+    """Packed statuses of many assessments in one contiguous buffer.
+
+    Rows are tenants and columns are controls in layout order, so a whole
+    portfolio of 10,000 assessments over the 93 Annex A controls takes
+    under 1 MB and counting or filtering is done with bytes operations.
+    """
+
+    def __init__(self, layout):
+        self.layout = layout
+        self.tenants = []
+        self.buffer = bytearray()
+        self._rows = {}
+
+    def __len__(self):
+        return len(self.tenants)
+
+    def add(self, tenant_id, packed):
+        if packed.layout != self.layout:
+            raise ValueError("Packed statuses use a different catalog layout")
+        if tenant_id in self._rows:
+            row = self._rows[tenant_id]
+            start = row * self.layout.width
+            self.buffer[start:start + self.layout.width] = packed.buffer
+            return
+        self._rows[tenant_id] = len(self.tenants)
+        self.tenants.append(tenant_id)
+        self.buffer += packed.buffer
+
+    def add_snapshot(self, tenant_id, snapshot):
+        self.add(tenant_id, PackedStatuses.from_snapshot(self.layout, snapshot))
+
+    def row(self, tenant_id):
+        start = self._rows[tenant_id] * self.layout.width
+        return PackedStatuses(self.layout,
+                              self.buffer[start:start + self.layout.width])
+
+    def column(self, control_id):
+        """Status bytes of ``control_id`` for every tenant, in row order."""
+        return self.buffer[self.layout.offsets[control_id]::self.layout.width]
+
+    def count(self, status):
+        return self.buffer.count(STATUS_CODES[status])
+
+    def tenants_with(self, control_id, status):
+        column = self.column(control_id)
+        return [self.tenants[row]
+                for row in _find_all(column, STATUS_CODES[status])]
+
+    @classmethod
+    def from_registry(cls, registry, layout, tenant_ids=None):
+        portfolio = cls(layout)
+        if tenant_ids is None:
+            tenant_ids = registry.tenants()
+        for tenant_id in tenant_ids:
+            portfolio.add_snapshot(tenant_id,
+                                   registry.get(tenant_id).snapshot())
+        return portfolio
+
+    def save(self, f):
+        header = {"catalog": self.layout.catalog_key,
+                  "controls": list(self.layout.control_ids),
+                  "tenants": self.tenants}
+        f.write(PORTFOLIO_MAGIC)
+        f.write(json.dumps(header).encode("utf-8") + b"\n")
+        f.write(self.buffer)
+
+    @classmethod
+    def load(cls, f):
+        if f.readline() != PORTFOLIO_MAGIC:
+            raise ValueError("Not a packed portfolio file")
+        header = json.loads(f.readline())
+        portfolio = cls(StatusLayout(header['catalog'], header['controls']))
+        portfolio.buffer = bytearray(f.read())
+        expected = len(header['tenants']) * portfolio.layout.width
+        if len(portfolio.buffer) != expected:
+            raise ValueError("Truncated packed portfolio file")
+        for tenant_id in header['tenants']:
+            portfolio._rows[tenant_id] = len(portfolio.tenants)
+            portfolio.tenants.append(tenant_id)
+        return portfolio
+
+
+def _find_all(buffer, code):
+    needle = bytes((code,))
+    offset = buffer.find(needle)
+    while offset != -1:
+        yield offset
+        offset = buffer.find(needle, offset + 1)
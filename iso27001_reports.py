@@ -0,0 +1,161 @@
+from iso27001_store import ControlStatus, counters_for
+
+ATTENTION_STATUSES = (ControlStatus.NOT_STARTED, ControlStatus.IN_PROGRESS)
+
+
+def compliance_counters(catalog, snapshot):
+    """Return the snapshot's counters, recounting if they are missing."""
+    counters = snapshot.counters
+    if counters is None or counters.get('catalog') != catalog.key:
+        counters = counters_for(catalog).rebuild(
+            {control_id: status.name
+             for control_id, status in snapshot.statuses.items()})
+    return counters
+
+
+def compliance_summary(catalog, snapshot):
+    """Structured form of the breakdown printed by generate_compliance_report."""
+    counters = compliance_counters(catalog, snapshot)
+    total = len(catalog.ids)
+    status_counts = {status.name: counters['status'][status.name]
+                     for status in ControlStatus}
+    return {
+        "total_controls": total,
+        "status_counts": status_counts,
+        "percentages": {name: round(count / total * 100, 1) if total else 0.0
+                        for name, count in status_counts.items()},
+        "domains": {domain: dict(counts)
+                    for domain, counts in counters['domain'].items()},
+        "phases": {phase: dict(counts)
+                   for phase, counts in counters['phase'].items()},
+        "needing_attention": [
+            {"control": control_id,
+             "title": catalog.controls[control_id]['title'],
+             "status": status.name}
+            for control_id, status in snapshot.statuses.items()
+            if status in ATTENTION_STATUSES and control_id in catalog.controls],
+        "last_updated": snapshot.last_updated,
+    }
+
+
+def report_lines(summary):
+    """Text lines of the compliance report, as generate_compliance_report."""
+    total = summary["total_controls"]
+    lines = ["=== Compliance Report ===", "", f"Total Controls: {total}"]
+    for status in ControlStatus:
+        lines.append(f"{status.value}: {summary['status_counts'][status.name]} "
+                     f"({summary['percentages'][status.name]:.1f}%)")
+    lines += ["", "Implemented by Domain:"]
+    for domain, counts in summary["domains"].items():
+        lines.append(f" - {domain}: {counts['IMPLEMENTED']}/"
+                     f"{sum(counts.values())}")
+    lines += ["", "Controls Needing Attention:"]
+    for item in summary["needing_attention"]:
+        lines.append(f" - {item['control']}: {item['title']} ({item['status']})")
+    lines += ["", f"Last Updated: {summary['last_updated']}"]
+    return lines
+
+
+def roadmap_summary(catalog, snapshot=None):
+    counters = compliance_counters(catalog, snapshot) if snapshot else None
+    phases = []
+    for phase in catalog.phases:
+        item = {"phase": phase['phase'], "name": phase['name'],
+                "tasks": list(phase['tasks']),
+                "controls": list(catalog.phase_controls.get(phase['phase'], ()))}
+        if counters is not None:
+            item["status_counts"] = dict(
+                counters['phase'].get(str(phase['phase']), {}))
+        phases.append(item)
+    return phases
+
+
+def roadmap_lines(phases):
+    lines = ["=== ISO 27001 Implementation Roadmap ==="]
+    for phase in phases:
+        lines += ["", f"Phase {phase['phase']}: {phase['name']}"]
+        counts = phase.get("status_counts")
+        if counts:
+            lines.append(f"Controls implemented: {counts['IMPLEMENTED']}/"
+                         f"{sum(counts.values())}")
+        lines.append("Tasks:")
+        lines += [f" - {task}" for task in phase["tasks"]]
+    return lines
+
+
+def control_register(catalog, snapshot, control_ids=None):
+    """Yield one row per control: ID, title, domain, status and note."""
+    for control_id in control_ids if control_ids is not None else catalog.ids:
+        control = catalog.controls[control_id]
+        yield {"control": control_id, "title": control['title'],
+               "domain": control['domain'],
+               "status": snapshot.status(control_id).name,
+               "note": snapshot.note(control_id)}
+
+
+def control_detail(catalog, snapshot, control_id):
+    control = catalog.controls[control_id]
+    detail = {"control": control_id}
+    detail.update(control)
+    detail["status"] = snapshot.status(control_id).name
+    detail["note"] = snapshot.note(control_id)
+    return detail
+
+
+TREND_LINES = 12
+
+
+def trend_fields(catalog):
+    return (("period_start",) + tuple(status.name for status in ControlStatus)
+            + ("implemented_pct", "remaining", "in_progress_exits",
+               "avg_in_progress_days")
+            + tuple(f"{domain} implemented" for domain in catalog.by_domain))
+
+
+def trend_rows(catalog, history, period="week", since=None, until=None):
+    """Yield one burn-down row per day or week from the history rollups.
+
+    ``remaining`` counts controls neither implemented nor not applicable;
+    ``avg_in_progress_days`` averages the controls that left In Progress
+    during the period (blank when none did).
+    """
+    total = len(catalog.ids)
+    for bucket in history.rollups(period, since, until):
+        counts = bucket.statuses
+        row = {"period_start": bucket.start.isoformat()}
+        row.update(counts)
+        row["implemented_pct"] = (round(counts["IMPLEMENTED"] / total * 100, 1)
+                                  if total else 0.0)
+        row["remaining"] = (total - counts["IMPLEMENTED"]
+                            - counts["NOT_APPLICABLE"])
+        exits = bucket.in_progress_exits
+        row["in_progress_exits"] = exits
+        row["avg_in_progress_days"] = (
+            round(bucket.in_progress_seconds / exits / 86400, 2)
+            if exits else "")
+        for domain in catalog.by_domain:
+            row[f"{domain} implemented"] = bucket.domains.get(domain, 0)
+        yield row
+
+
+def trend_lines(rows, period="week"):
+    """Text trend section: the last ``TREND_LINES`` periods of ``rows``."""
+    rows = list(rows)
+    label = "Daily" if period == "day" else "Weekly"
+    lines = [f"{label} Trend:"]
+    if not rows:
+        return lines + [" No status changes recorded yet."]
+    lines.append(f" {'Period':<12}{'Implemented':>12}{'In Progress':>12}"
+                 f"{'Remaining':>10}{'Done %':>8}{'Avg days IP':>12}")
+    for row in rows[-TREND_LINES:]:
+        lines.append(f" {row['period_start']:<12}{row['IMPLEMENTED']:>12}"
+                     f"{row['IN_PROGRESS']:>12}{row['remaining']:>10}"
+                     f"{row['implemented_pct']:>8.1f}"
+                     f"{row['avg_in_progress_days']:>12}")
+    exits = sum(row["in_progress_exits"] for row in rows)
+    if exits:
+        days = sum(row["avg_in_progress_days"] * row["in_progress_exits"]
+                   for row in rows if row["in_progress_exits"]) / exits
+        lines.append(f"Average time In Progress: {days:.1f} days "
+                     f"({exits} controls completed it)")
+    return lines
@@ -0,0 +1,162 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from iso27001_catalog import default_catalog
+from iso27001_reports import compliance_summary
+from iso27001_store import DEFAULT_DATA_FILES, ControlStatus, read_snapshot
+
+DEFAULT_CHUNK_SIZE = 32
+
+
+def find_assessments(root):
+    """Yield ``(tenant_id, path)`` for every JSON assessment under ``root``.
+
+    A file named ``iso27001_data.json`` takes its tenant ID from its
+    directory (as laid out by ``TenantRegistry``); any other ``.json`` file
+    is named after itself.
+    """
+    for directory, subdirs, files in os.walk(root):
+        subdirs.sort()
+        for filename in sorted(files):
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(directory, filename)
+            if filename == DEFAULT_DATA_FILES["json"]:
+                tenant_id = os.path.basename(directory)
+            else:
+                tenant_id = os.path.splitext(filename)[0]
+            yield tenant_id, path
+
+
+def summarize_assessment(tenant_id, path, catalog=None):
+    catalog = catalog or default_catalog()
+    try:
+        summary = compliance_summary(catalog, read_snapshot(path, catalog))
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        return {"tenant": tenant_id, "file": path, "error": str(e)}
+    summary.update(tenant=tenant_id, file=path)
+    return summary
+
+
+def _summarize_batch(batch):
+    catalog = default_catalog()
+    return [summarize_assessment(tenant_id, path, catalog)
+            for tenant_id, path in batch]
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rollup(assessments, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Summarize assessments in a process pool, yielding results as they finish.
+
+    ``assessments`` is an iterable of ``(tenant_id, path)`` pairs; results
+    arrive in completion order, not input order.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_summarize_batch, batch)
+                   for batch in _batches(assessments, chunk_size)]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+class PortfolioTotals:
+    def __init__(self):
+        self.tenants = 0
+        self.failed = 0
+        self.controls = 0
+        self.status_counts = {status.name: 0 for status in ControlStatus}
+        self.domains = {}
+
+    def add(self, summary):
+        if "error" in summary:
+            self.failed += 1
+            return
+        self.tenants += 1
+        self.controls += summary["total_controls"]
+        for name, count in summary["status_counts"].items():
+            self.status_counts[name] += count
+        for domain, counts in summary["domains"].items():
+            totals = self.domains.setdefault(
+                domain, {status.name: 0 for status in ControlStatus})
+            for name, count in counts.items():
+                totals[name] += count
+
+    def as_dict(self):
+        return {
+            "tenants": self.tenants,
+            "failed": self.failed,
+            "total_controls": self.controls,
+            "status_counts": self.status_counts,
+            "percentages": {
+                name: round(count / self.controls * 100, 1)
+                if self.controls else 0.0
+                for name, count in self.status_counts.items()},
+            "domains": self.domains,
+        }
+
+
+def _write_text(summary, out):
+    if "error" in summary:
+        print(f"{summary['tenant']}: ERROR {summary['error']}", file=out)
+        return
+    implemented = summary["status_counts"]["IMPLEMENTED"]
+    print(f"{summary['tenant']}: {implemented}/{summary['total_controls']} "
+          f"implemented ({summary['percentages']['IMPLEMENTED']}%)", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Combined compliance report over a directory of "
+                    "iso27001_data.json-format assessments.")
+    parser.add_argument("directory")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="assessments per worker task")
+    parser.add_argument("--format", choices=("jsonl", "text"), default="jsonl")
+    parser.add_argument("--quiet", action="store_true",
+                        help="don't report progress on stderr")
+    args = parser.parse_args(argv)
+
+    assessments = list(find_assessments(args.directory))
+    totals = PortfolioTotals()
+    out = sys.stdout
+    for done, summary in enumerate(
+            rollup(assessments, args.workers, args.chunk_size), 1):
+        totals.add(summary)
+        if args.format == "jsonl":
+            out.write(json.dumps(summary) + "\n")
+        else:
+            _write_text(summary, out)
+        if not args.quiet:
+            print(f"\r{done}/{len(assessments)} assessments", end="",
+                  file=sys.stderr, flush=True)
+    if not args.quiet and assessments:
+        print(file=sys.stderr)
+
+    portfolio = totals.as_dict()
+    if args.format == "jsonl":
+        out.write(json.dumps({"portfolio": portfolio}) + "\n")
+    else:
+        print(f"\nPortfolio: {portfolio['tenants']} assessments, "
+              f"{portfolio['failed']} failed", file=out)
+        for status in ControlStatus:
+            print(f"{status.value}: {portfolio['status_counts'][status.name]} "
+                  f"({portfolio['percentages'][status.name]}%)", file=out)
+    return 1 if totals.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,382 @@
+import argparse
+import asyncio
+import hashlib
+import ipaddress
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
+
+from iso27001_cache import RenderCache, shared_render_cache
+from iso27001_catalog import default_catalog
+from iso27001_reports import (compliance_summary, control_detail,
+                              control_register, roadmap_summary)
+from iso27001_store import open_store, parse_status
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8027
+DEFAULT_WORKERS = 8
+KEEPALIVE_TIMEOUT = 15.0
+MAX_BODY = 64 * 1024
+MAX_HEADERS = 100
+WRITE_METHODS = ("PUT", "PATCH", "POST")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or HTTPStatus(status).phrase)
+        self.status = status
+
+
+class AssessmentServer:
+    """Small HTTP/1.1 JSON API over the assessment stores.
+
+    Serves either one ``store`` at ``/controls``, ``/report``... or every
+    tenant of a ``registry`` under ``/tenants/<id>/...``.  Store access
+    runs on a thread pool so the event loop never waits on file I/O, and
+    writes to one tenant are serialized through a per-tenant lock.
+
+    GET responses carry an ETag derived from the catalog and the state
+    version: a matching ``If-None-Match`` gets a bodyless 304, and encoded
+    bodies are kept in a ``RenderCache`` (the process-wide one by default)
+    so polling an unchanged view never re-renders it.
+    """
+
+    def __init__(self, catalog, store=None, registry=None,
+                 workers=DEFAULT_WORKERS, cache=None):
+        if (store is None) == (registry is None):
+            raise ValueError("Pass exactly one of store or registry")
+        self.catalog = catalog
+        self.store = store
+        self.registry = registry
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.requests = 0
+        self.not_modified = 0
+        self.cache = cache if cache is not None else shared_render_cache()
+        self._writers = {}
+
+    # Store access; these run on the executor.
+
+    def _store(self, tenant_id):
+        if self.registry is None:
+            return self.store
+        return self.registry.get(tenant_id)
+
+    def _snapshot(self, tenant_id):
+        return self._store(tenant_id).snapshot()
+
+    def _commit(self, tenant_id, statuses, notes):
+        store = self._store(tenant_id)
+        store.commit(statuses=statuses, notes=notes)
+        return store.snapshot()
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    # Routing.
+
+    async def dispatch(self, method, target, body, headers=None):
+        """Return ``(status, body bytes or None, extra headers)``."""
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.split("/") if part]
+        query = {key: values[-1]
+                 for key, values in parse_qs(url.query).items()}
+
+        tenant_id = None
+        if self.registry is not None and parts != ["stats"]:
+            if len(parts) < 3 or parts[0] != "tenants":
+                raise HTTPError(404)
+            tenant_id = parts[1]
+            try:
+                self.registry.validate_tenant_id(tenant_id)
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+            parts = parts[2:]
+            # Only writes create a tenant; a mistyped ID in a GET must not
+            # leave an empty assessment behind.
+            if method not in WRITE_METHODS and not await self._run(
+                    self.registry.exists, tenant_id):
+                raise HTTPError(404, f"Unknown tenant: {tenant_id}")
+
+        if_none_match = (headers or {}).get("if-none-match")
+        if parts == ["controls"] and method == "GET":
+            control_ids, status = self._list_filters(query)
+            snapshot = await self._run(self._snapshot, tenant_id)
+            view = "controls?" + urlencode(sorted(query.items()))
+            return self.render(
+                tenant_id, snapshot, view, if_none_match,
+                lambda: [row for row in control_register(
+                    self.catalog, snapshot, control_ids)
+                    if status is None or row["status"] == status.name])
+        if len(parts) == 2 and parts[0] == "controls":
+            control_id = self.catalog.normalize_id(parts[1])
+            if control_id is None:
+                raise HTTPError(404, f"Unknown control ID: {parts[1]}")
+            if method == "GET":
+                snapshot = await self._run(self._snapshot, tenant_id)
+                return self.render(
+                    tenant_id, snapshot, "controls/" + control_id,
+                    if_none_match,
+                    lambda: control_detail(self.catalog, snapshot, control_id))
+            if method in WRITE_METHODS:
+                snapshot = await self.update_control(tenant_id, control_id,
+                                                     body)
+                return (200, _encode(control_detail(self.catalog, snapshot,
+                                                    control_id)),
+                        {"ETag": self.etag(tenant_id, snapshot)})
+            raise HTTPError(405)
+        if parts == ["report"] and method == "GET":
+            snapshot = await self._run(self._snapshot, tenant_id)
+            return self.render(
+                tenant_id, snapshot, "report", if_none_match,
+                lambda: compliance_summary(self.catalog, snapshot))
+        if parts == ["roadmap"] and method == "GET":
+            snapshot = await self._run(self._snapshot, tenant_id)
+            return self.render(
+                tenant_id, snapshot, "roadmap", if_none_match,
+                lambda: roadmap_summary(self.catalog, snapshot))
+        if parts == ["stats"] and method == "GET":
+            return 200, _encode(self.stats()), {}
+        if parts and parts[0] in ("controls", "report", "roadmap", "stats"):
+            raise HTTPError(405)
+        raise HTTPError(404)
+
+    def scope(self, tenant_id):
+        """Render cache scope: the absolute path of the assessment file."""
+        if self.registry is None:
+            return os.path.abspath(self.store.data_file)
+        return os.path.abspath(self.registry.path_for(tenant_id))
+
+    def etag(self, tenant_id, snapshot):
+        key = (f"{self.catalog.key}|{tenant_id or ''}|{snapshot.version}|"
+               f"{snapshot.last_updated}")
+        return '"%s"' % hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+    def render(self, tenant_id, snapshot, view, if_none_match, build):
+        """Answer a GET of ``view``, calling ``build`` only when needed."""
+        etag = self.etag(tenant_id, snapshot)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if if_none_match is not None and _etag_matches(if_none_match, etag):
+            self.not_modified += 1
+            return 304, None, headers
+        body = self.cache.render(self.catalog, self.scope(tenant_id),
+                                 snapshot, view, lambda: _encode(build()))
+        return 200, body, headers
+
+    def stats(self):
+        stats = {"requests": self.requests, "not_modified": self.not_modified,
+                 "render_cache": self.cache.stats()}
+        if self.registry is not None:
+            stats["tenants"] = self.registry.stats()
+        return stats
+
+    def _list_filters(self, query):
+        control_ids = self.catalog.ids
+        if "domain" in query:
+            domain = next((name for name in self.catalog.by_domain
+                           if name.lower() == query["domain"].lower()), None)
+            if domain is None:
+                raise HTTPError(400, f"Unknown domain: {query['domain']}")
+            control_ids = self.catalog.by_domain[domain]
+        status = None
+        if "status" in query:
+            try:
+                status = parse_status(query["status"])
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+        return control_ids, status
+
+    async def update_control(self, tenant_id, control_id, body):
+        try:
+            changes = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Request body must be JSON")
+        if not isinstance(changes, dict) or not (
+                "status" in changes or "note" in changes):
+            raise HTTPError(400, "Expected an object with status and/or note")
+        statuses = notes = None
+        if "status" in changes:
+            try:
+                statuses = {control_id: parse_status(str(changes["status"]))}
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+        if "note" in changes:
+            notes = {control_id: str(changes["note"] or "")}
+
+        lock = self._writers.get(tenant_id)
+        if lock is None:
+            lock = self._writers[tenant_id] = asyncio.Lock()
+        async with lock:
+            return await self._run(self._commit, tenant_id, statuses, notes)
+
+    # HTTP.
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(_read_request(reader),
+                                                     KEEPALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                        ConnectionError):
+                    break
+                except HTTPError as e:
+                    _write_response(writer, e.status,
+                                    _encode({"error": str(e)}), {},
+                                    keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+
+                method, target, headers, body, keep_alive = request
+                self.requests += 1
+                try:
+                    status, payload, extra = await self.dispatch(
+                        method, target, body, headers)
+                except HTTPError as e:
+                    status, payload, extra = (e.status,
+                                              _encode({"error": str(e)}), {})
+                except Exception as e:
+                    status, payload, extra = 500, _encode(
+                        {"error": f"{type(e).__name__}: {e}"}), {}
+                _write_response(writer, status, payload, extra, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        if self.registry is not None:
+            self.registry.close()
+        else:
+            self.store.close()
+
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(431)
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if "transfer-encoding" in headers:
+        # Bodies are only read by length; anything else would be taken
+        # for the next request on the connection.
+        raise HTTPError(501, "Transfer-Encoding is not supported")
+    length = headers.get("content-length", "0")
+    if not (length.isascii() and length.isdigit()):
+        raise HTTPError(400, "Invalid Content-Length")
+    length = int(length)
+    if length > MAX_BODY:
+        raise HTTPError(413)
+    body = await reader.readexactly(length) if length else b""
+
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.1":
+        keep_alive = connection != "close"
+    else:
+        keep_alive = connection == "keep-alive"
+    return method.upper(), target, headers, body, keep_alive
+
+
+def _etag_matches(if_none_match, etag):
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in ("*", etag):
+            return True
+    return False
+
+
+def _encode(payload):
+    return json.dumps(payload, indent=2).encode("utf-8") + b"\n"
+
+
+def _write_response(writer, status, body, headers, keep_alive):
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    if body is not None:
+        lines += ["Content-Type: application/json",
+                  f"Content-Length: {len(body)}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    writer.write(head + body if body is not None else head)
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve the ISO 27001 assessment as a local JSON API.")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help="loopback address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--data-file")
+    parser.add_argument("--backend", choices=("json", "sqlite"))
+    parser.add_argument("--tenants", metavar="ROOT",
+                        help="serve every tenant under /tenants/<id>/")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--cache-mb", type=float, metavar="MB",
+                        help="rendered-view cache size (default: 32)")
+    args = parser.parse_args(argv)
+    if not is_loopback(args.host):
+        parser.error(f"refusing to bind non-loopback address {args.host}")
+
+    catalog = default_catalog()
+    cache = None
+    if args.cache_mb is not None:
+        cache = RenderCache(int(args.cache_mb * 1024 * 1024))
+    if args.tenants:
+        from iso27001_tenants import TenantRegistry
+        app = AssessmentServer(catalog, registry=TenantRegistry(
+            args.tenants, args.backend, catalog=catalog),
+            workers=args.workers, cache=cache)
+    else:
+        store = open_store(args.data_file, args.backend, catalog=catalog)
+        store.initialize()
+        app = AssessmentServer(catalog, store=store, workers=args.workers,
+                               cache=cache)
+
+    print(f"Serving on http://{args.host}:{args.port}/", file=sys.stderr)
+    try:
+        asyncio.run(app.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from iso27001_store import (AssessmentStore, ConflictError, StateSnapshot,
+                            counters_for, new_state)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS control_status (
+    control_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS control_status_by_status
+    ON control_status (status);
+CREATE TABLE IF NOT EXISTS control_notes (
+    control_id TEXT PRIMARY KEY,
+    note TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history_queue (
+    version INTEGER PRIMARY KEY,
+    entry TEXT NOT NULL
+);
+"""
+
+
+class SqliteStore(AssessmentStore):
+    """Assessment state in a single SQLite database running in WAL mode.
+
+    Snapshots are cached until ``PRAGMA data_version`` reports a commit
+    from another connection, mirroring the stat check of ``JsonStore``.
+    With a history, each commit also queues its entry in
+    ``history_queue`` (the counterpart of the JSON journal) until the
+    history has recorded it.  WAL commits are synced at checkpoints only,
+    unless the store is ``durable``.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, data_file, timeout=30.0, catalog=None,
+                 durable=False):
+        self.data_file = data_file
+        self.durable = durable
+        if catalog is not None:
+            self.counters = counters_for(catalog)
+        self.hits = 0
+        self.misses = 0
+        self.timeout = timeout
+        self._db = None
+        self._lock = threading.RLock()
+        self._snapshot = None
+        self._data_version = None
+
+    @property
+    def _conn(self):
+        # Callers hold self._lock.  Opened on first use and again after
+        # close(), so a store evicted by TenantRegistry stays usable.
+        if self._db is None:
+            conn = sqlite3.connect(self.data_file, timeout=self.timeout,
+                                   isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=%s"
+                         % ("FULL" if self.durable else "NORMAL"))
+            self._db = conn
+        return self._db
+
+    def initialize(self):
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO metadata (key, value) VALUES (?, ?)",
+                ("last_updated", new_state()['last_updated']))
+            self._conn.execute(
+                "INSERT OR IGNORE INTO metadata (key, value) VALUES (?, ?)",
+                ("progress", "{}"))
+
+    def _read(self):
+        data = {
+            "controls_status": dict(self._conn.execute(
+                "SELECT control_id, status FROM control_status")),
+            "control_notes": dict(self._conn.execute(
+                "SELECT control_id, note FROM control_notes")),
+        }
+        metadata = dict(self._conn.execute("SELECT key, value FROM metadata"))
+        data['progress'] = json.loads(metadata.get('progress', '{}'))
+        data['last_updated'] = metadata.get('last_updated', 'Never')
+        data['version'] = int(metadata.get('version', 0))
+        if 'counters' in metadata:
+            data['counters'] = json.loads(metadata['counters'])
+        if self.counters is not None:
+            self.counters.ensure(data)
+        return data
+
+    def _read_counters(self):
+        row = self._conn.execute(
+            "SELECT value FROM metadata WHERE key = 'counters'").fetchone()
+        counters = json.loads(row[0]) if row else None
+        if counters and counters.get('catalog') == self.counters.catalog_key:
+            return counters
+        return self.counters.rebuild(dict(self._conn.execute(
+            "SELECT control_id, status FROM control_status")))
+
+    def _read_version(self):
+        row = self._conn.execute(
+            "SELECT value FROM metadata WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _write_counters(self, counters):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+            ("counters", json.dumps(counters)))
+
+    def snapshot(self):
+        with self._lock:
+            data_version = self._conn.execute(
+                "PRAGMA data_version").fetchone()[0]
+            if self._snapshot is not None and data_version == self._data_version:
+                self.hits += 1
+                return self._snapshot
+
+            self.misses += 1
+            self._conn.execute("BEGIN")
+            try:
+                self._snapshot = StateSnapshot(self._read())
+            finally:
+                self._conn.execute("COMMIT")
+            self._data_version = data_version
+            return self._snapshot
+
+    def commit(self, statuses=None, notes=None, expected_version=None,
+               actor=None):
+        entry = None
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = self._read_version()
+                if expected_version is not None and version != expected_version:
+                    raise ConflictError(f"Assessment changed since version "
+                                        f"{expected_version} (now {version})",
+                                        expected_version, version)
+                statuses = statuses or {}
+                transitions = []
+                if self.counters is not None or self.history is not None:
+                    for control_id, status in statuses.items():
+                        row = self._conn.execute(
+                            "SELECT status FROM control_status "
+                            "WHERE control_id = ?", (control_id,)).fetchone()
+                        transitions.append((control_id,
+                                            row[0] if row else "NOT_STARTED",
+                                            status.name))
+                if self.counters is not None and statuses:
+                    counters = self._read_counters()
+                    for control_id, old, new in transitions:
+                        self.counters.apply(counters, control_id, old, new)
+                    self._write_counters(counters)
+                elif statuses:
+                    # See _apply_entry in iso27001_store.
+                    self._conn.execute(
+                        "DELETE FROM metadata WHERE key = 'counters'")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO control_status (control_id, status) "
+                    "VALUES (?, ?)",
+                    [(control_id, status.name)
+                     for control_id, status in statuses.items()])
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO control_notes (control_id, note) "
+                    "VALUES (?, ?)",
+                    list((notes or {}).items()))
+                last_updated = str(datetime.now())
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                    [("last_updated", last_updated),
+                     ("version", str(version + 1))])
+                if self.history is not None:
+                    from iso27001_history import default_actor
+                    entry = {
+                        'version': version + 1,
+                        'last_updated': last_updated,
+                        'statuses': {control_id: new for control_id, _, new
+                                     in transitions},
+                        'old': {control_id: old for control_id, old, _
+                                in transitions},
+                        'actor': actor or default_actor(),
+                    }
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO history_queue (version, entry) "
+                        "VALUES (?, ?)", (version + 1, json.dumps(entry)))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._snapshot = None
+        if entry is not None:
+            self.history.submit(entry)
+
+    def history_entries(self, after=None):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                version = self._read_version()
+                statuses = dict(self._conn.execute(
+                    "SELECT control_id, status FROM control_status"))
+                entries = [json.loads(row[0]) for row in self._conn.execute(
+                    "SELECT entry FROM history_queue WHERE version > ? "
+                    "ORDER BY version", (-1 if after is None else after,))]
+            finally:
+                self._conn.execute("COMMIT")
+        return version, statuses, entries
+
+    def history_recorded(self, version):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM history_queue WHERE version <= ?", (version,))
+
+    def controls_with_status(self, status):
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT control_id FROM control_status WHERE status = ? "
+                "ORDER BY control_id", (status.name,))]
+
+    def export_state(self):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                data = self._read()
+            finally:
+                self._conn.execute("COMMIT")
+        data.pop('counters', None)
+        return data
+
+    def import_state(self, data):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM control_status")
+                self._conn.execute("DELETE FROM control_notes")
+                self._conn.executemany(
+                    "INSERT INTO control_status (control_id, status) "
+                    "VALUES (?, ?)",
+                    list(data['controls_status'].items()))
+                self._conn.executemany(
+                    "INSERT INTO control_notes (control_id, note) "
+                    "VALUES (?, ?)",
+                    list(data.get('control_notes', {}).items()))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO metadata (key, value) "
+                    "VALUES (?, ?)",
+                    [("last_updated", data.get('last_updated', 'Never')),
+                     ("progress", json.dumps(data.get('progress', {}))),
+                     ("version", str(max(data.get('version', 0),
+                                         self._read_version() + 1)))])
+                self._conn.execute("DELETE FROM metadata WHERE key = 'counters'")
+                if self.counters is not None:
+                    self._write_counters(
+                        self.counters.rebuild(data['controls_status']))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._snapshot = None
+
+    def _rebuild_counters(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._write_counters(self.counters.rebuild(dict(
+                    self._conn.execute(
+                        "SELECT control_id, status FROM control_status"))))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._snapshot = None
+
+    def close(self):
+        if self.history is not None:
+            # First, as recording queued entries may read this database.
+            self.history.close()
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+            # data_version is per connection; start over after reopening.
+            self._snapshot = None
+            self._data_version = None
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "conflicts": self.conflicts}
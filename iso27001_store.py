@@ -0,0 +1,819 @@
+import argparse
+import copy
+import json
+import os
+import stat
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from enum import Enum
+from types import MappingProxyType
+
+from iso27001_catalog import DEFAULT_CATALOG_FILE, freeze
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process use only
+    fcntl = None
+
+JOURNAL_SUFFIX = ".journal"
+LOCK_SUFFIX = ".lock"
+DEFAULT_JOURNAL_LIMIT = 64 * 1024
+DEFAULT_UPDATE_RETRIES = 10
+
+DEFAULT_BACKEND = "json"
+DEFAULT_DATA_FILES = {
+    "json": "iso27001_data.json",
+    "sqlite": "iso27001_data.db",
+}
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+class ControlStatus(Enum):
+    NOT_STARTED = "Not Started"
+    IN_PROGRESS = "In Progress"
+    IMPLEMENTED = "Implemented"
+    NOT_APPLICABLE = "Not Applicable"
+
+
+class ConflictError(Exception):
+    """A commit was based on a state version that is no longer current."""
+
+    def __init__(self, message, expected=None, actual=None):
+        super().__init__(message)
+        self.expected = expected
+        self.actual = actual
+
+
+def parse_status(text):
+    """Map user input such as "implemented", "in-progress" or "Not Applicable"
+    to a ``ControlStatus``; raise ValueError for anything else."""
+    key = text.strip().upper().replace("-", "_").replace(" ", "_")
+    for status in ControlStatus:
+        if key in (status.name, status.value.upper().replace(" ", "_")):
+            return status
+    raise ValueError(f"Unknown status {text!r}; expected one of: "
+                     + ", ".join(status.name.lower().replace("_", "-")
+                                 for status in ControlStatus))
+
+
+def write_json_atomic(path, data):
+    """Replace ``path`` with ``data`` so readers see either the old or new file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = _create_temp(path, directory)
+    try:
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = None
+        if mode is not None and hasattr(os, 'fchmod'):
+            # Keep a shared assessment's permissions across rewrites.
+            os.fchmod(fd, mode)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+def _create_temp(path, directory):
+    """Open a new temporary file beside ``path``.
+
+    Unlike ``mkstemp`` (always 0600) the file is created 0666 less the
+    umask, like any file the user creates.
+    """
+    prefix = os.path.join(directory, '.' + os.path.basename(path) + '.')
+    for _ in range(100):
+        tmp_path = f"{prefix}{os.urandom(6).hex()}.tmp"
+        try:
+            return os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                           0o666), tmp_path
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"No unused temporary file name for {path}")
+
+
+def _fsync_directory(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # not supported on this platform (e.g. Windows)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class StateSnapshot:
+    """Read-only view of one parsed state, with statuses already decoded.
+
+    ``version`` goes up by one with every commit, so two snapshots of one
+    assessment with the same version hold the same state.
+    """
+
+    __slots__ = ('statuses', 'notes', 'last_updated', 'counters', 'version')
+
+    def __init__(self, data):
+        statuses = {control_id: ControlStatus[name]
+                    for control_id, name in data['controls_status'].items()}
+        object.__setattr__(self, 'statuses', MappingProxyType(statuses))
+        object.__setattr__(self, 'notes', MappingProxyType(
+            dict(data.get('control_notes', {}))))
+        object.__setattr__(self, 'last_updated',
+                           data.get('last_updated', 'Never'))
+        object.__setattr__(self, 'counters', freeze(data.get('counters')))
+        object.__setattr__(self, 'version', data.get('version', 0))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("StateSnapshot is read-only")
+
+    def status(self, control_id):
+        return self.statuses.get(control_id, ControlStatus.NOT_STARTED)
+
+    def note(self, control_id):
+        return self.notes.get(control_id, "")
+
+
+class ComplianceCounters:
+    """Running status counts overall, per domain and per roadmap phase.
+
+    The counts cover the controls of one catalog, with unrecorded controls
+    counted as NOT_STARTED, and are kept in the state under ``counters``.
+    Stores update them with ``apply`` on every status change, so reports
+    never have to walk the whole assessment.
+    """
+
+    def __init__(self, catalog):
+        self.catalog_key = catalog.key
+        self._buckets = {control_id: [("domain", control['domain'])]
+                         for control_id, control in catalog.controls.items()}
+        for phase, control_ids in catalog.phase_controls.items():
+            for control_id in control_ids:
+                self._buckets[control_id].append(("phase", str(phase)))
+        self._all_buckets = list(dict.fromkeys(
+            bucket for buckets in self._buckets.values() for bucket in buckets))
+
+    def rebuild(self, statuses):
+        """Count ``statuses`` (control ID -> status name) from scratch."""
+        counters = {"catalog": self.catalog_key, "status": _zero_counts(),
+                    "domain": {}, "phase": {}}
+        for group, bucket in self._all_buckets:
+            counters[group][bucket] = _zero_counts()
+        for control_id in self._buckets:
+            self._add(counters, control_id,
+                      statuses.get(control_id, "NOT_STARTED"), 1)
+        return counters
+
+    def ensure(self, data):
+        counters = data.get('counters')
+        if counters is None or counters.get('catalog') != self.catalog_key:
+            data['counters'] = self.rebuild(data['controls_status'])
+
+    def apply(self, counters, control_id, old, new):
+        if control_id in self._buckets and old != new:
+            self._add(counters, control_id, old, -1)
+            self._add(counters, control_id, new, 1)
+
+    def _add(self, counters, control_id, name, delta):
+        counters['status'][name] += delta
+        for group, bucket in self._buckets[control_id]:
+            counters[group][bucket][name] += delta
+
+    def drift(self, stored, expected):
+        """List ``(group, bucket, status, stored, expected)`` mismatches."""
+        stored_counts = _flatten_counters(stored)
+        mismatches = []
+        for key, count in _flatten_counters(expected).items():
+            if stored_counts.get(key) != count:
+                mismatches.append(key + (stored_counts.get(key), count))
+        return mismatches
+
+
+_shared_counters = {}
+
+
+def counters_for(catalog):
+    """Return the ``ComplianceCounters`` shared by stores of ``catalog``."""
+    counters = _shared_counters.get(catalog.key)
+    if counters is None:
+        counters = _shared_counters[catalog.key] = ComplianceCounters(catalog)
+    return counters
+
+
+STATUS_NAMES = tuple(status.name for status in ControlStatus)
+
+
+def _zero_counts():
+    return dict.fromkeys(STATUS_NAMES, 0)
+
+
+def _flatten_counters(counters):
+    flat = {}
+    if not counters:
+        return flat
+    for name, count in counters['status'].items():
+        flat[("status", None, name)] = count
+    for group in ("domain", "phase"):
+        for bucket, counts in counters[group].items():
+            for name, count in counts.items():
+                flat[(group, bucket, name)] = count
+    return flat
+
+
+class FileLock:
+    """Advisory ``fcntl`` lock on a companion ``.lock`` file.
+
+    The data file itself can't carry the lock because atomic writes
+    replace its inode.  Acquisitions nest, so callers must serialize use
+    of one ``FileLock`` between threads (``JsonStore`` holds its own RLock
+    around every call).  Without ``fcntl`` locking is a no-op.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._depth = 0
+
+    @contextmanager
+    def _locked(self, operation):
+        if self._depth == 0 and fcntl is not None:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, operation)
+            except BaseException:
+                os.close(fd)
+                raise
+            self._fd = fd
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0 and self._fd is not None:
+                os.close(self._fd)  # closing releases the lock
+                self._fd = None
+
+    def shared(self):
+        return self._locked(fcntl.LOCK_SH if fcntl else None)
+
+    def exclusive(self):
+        return self._locked(fcntl.LOCK_EX if fcntl else None)
+
+
+def new_state():
+    return {
+        "progress": {},
+        "controls_status": {},
+        "control_notes": {},
+        "last_updated": str(datetime.now()),
+        "version": 0
+    }
+
+
+def _trim_torn_line(f, chunk_size=4096):
+    """Cut a journal opened for appending back to its last complete line.
+
+    Readers skip a torn final line, but an entry appended after it would
+    be glued onto the torn bytes and make the journal unreadable.
+    """
+    end = f.seek(0, os.SEEK_END)
+    if end == 0:
+        return
+    f.seek(end - 1)
+    if f.read(1) == b'\n':
+        return
+    pos = end
+    while pos > 0:
+        start = max(0, pos - chunk_size)
+        f.seek(start)
+        newline = f.read(pos - start).rfind(b'\n')
+        if newline >= 0:
+            f.truncate(start + newline + 1)
+            return
+        pos = start
+    f.truncate(0)
+
+
+def _apply_entry(data, entry, counters=None):
+    statuses = entry.get('statuses', {})
+    if counters is not None:
+        for control_id, name in statuses.items():
+            counters.apply(data['counters'], control_id,
+                           data['controls_status'].get(control_id, "NOT_STARTED"),
+                           name)
+    elif statuses:
+        # Counters can't be maintained without a catalog; drop them so the
+        # next store that has one rebuilds them instead of trusting stale
+        # numbers.
+        data.pop('counters', None)
+    data['controls_status'].update(statuses)
+    data['control_notes'].update(entry.get('notes', {}))
+    data['last_updated'] = entry['last_updated']
+    data['version'] = entry.get('version', data.get('version', 0) + 1)
+
+
+def _check_version(data, expected_version):
+    actual = data.get('version', 0)
+    if expected_version is not None and actual != expected_version:
+        raise ConflictError(f"Assessment changed since version "
+                            f"{expected_version} (now {actual})",
+                            expected_version, actual)
+
+
+def _copy_state(data):
+    data = dict(data)
+    data['controls_status'] = dict(data['controls_status'])
+    data['control_notes'] = dict(data.get('control_notes', {}))
+    if 'counters' in data:
+        data['counters'] = copy.deepcopy(data['counters'])
+    return data
+
+
+class AssessmentStore:
+    """Interface implemented by every assessment storage backend.
+
+    Backends hand out ``StateSnapshot`` objects for reads and apply status
+    and note changes through ``commit``.  ``export_state``/``import_state``
+    use the ``iso27001_data.json`` layout so any two backends can be
+    converted into each other with ``migrate``.
+    """
+
+    backend = None
+    counters = None
+    history = None
+    conflicts = 0
+
+    def initialize(self):
+        raise NotImplementedError
+
+    def snapshot(self):
+        raise NotImplementedError
+
+    def commit(self, statuses=None, notes=None, expected_version=None,
+               actor=None):
+        raise NotImplementedError
+
+    def update(self, changes, retries=DEFAULT_UPDATE_RETRIES):
+        """Optimistic read-modify-write.
+
+        ``changes(snapshot)`` returns the ``(statuses, notes)`` to commit,
+        or raises ``ConflictError`` to reject the update.  If another
+        writer commits in between, the snapshot is re-read and ``changes``
+        called again, up to ``retries`` times.  Returns the number of
+        retries needed.
+        """
+        attempt = 0
+        while True:
+            snapshot = self.snapshot()
+            statuses, notes = changes(snapshot)
+            try:
+                self.commit(statuses, notes, expected_version=snapshot.version)
+                return attempt
+            except ConflictError:
+                attempt += 1
+                self.conflicts += 1
+                if retries is not None and attempt > retries:
+                    raise
+
+    def export_state(self):
+        raise NotImplementedError
+
+    def import_state(self, data):
+        raise NotImplementedError
+
+    def history_entries(self, after=None):
+        """State for ``HistoryStore.sync``: the current version, the status
+        names, and the commit entries (with ``old`` and ``actor``) still
+        held since version ``after`` that lead up to it."""
+        snapshot = self.snapshot()
+        return snapshot.version, {control_id: status.name for control_id,
+                                  status in snapshot.statuses.items()}, []
+
+    def history_recorded(self, version):
+        """The history holds every commit up to ``version``."""
+
+    def close(self):
+        """Release open handles and cached state.
+
+        A closed store is not finished with: it reopens what it needs on
+        its next use, so callers still holding it keep working.
+        """
+
+    def get_status(self, control_id):
+        return self.snapshot().status(control_id)
+
+    def get_note(self, control_id):
+        return self.snapshot().note(control_id)
+
+    def controls_with_status(self, status):
+        """Return the IDs of controls explicitly recorded with ``status``."""
+        return [control_id
+                for control_id, current in self.snapshot().statuses.items()
+                if current is status]
+
+    def check_counters(self, repair=False):
+        """Recount the state from scratch and report counter drift.
+
+        Returns the mismatches found (see ``ComplianceCounters.drift``);
+        with ``repair`` the recounted values replace the stored ones.
+        """
+        if self.counters is None:
+            raise ValueError("Counters need a store opened with a catalog")
+        snapshot = self.snapshot()
+        expected = self.counters.rebuild(
+            {control_id: status.name
+             for control_id, status in snapshot.statuses.items()})
+        mismatches = self.counters.drift(snapshot.counters, expected)
+        if mismatches and repair:
+            self._rebuild_counters()
+        return mismatches
+
+    def _rebuild_counters(self):
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+
+class JsonStore(AssessmentStore):
+    """Keeps the parsed assessment file in memory.
+
+    The file is parsed again only when its inode, size or mtime changes, so
+    repeated lookups during a listing cost a single ``os.stat`` each.
+
+    Commits are appended to ``<data_file>.journal`` and replayed on load.
+    Once the journal grows past ``journal_limit`` bytes it is folded back
+    into the snapshot by a background compaction.  A ``journal_limit`` of
+    ``None`` disables the journal and rewrites the snapshot on every commit.
+
+    Every read of the files happens under a shared ``fcntl`` lock and every
+    write under an exclusive one, so several processes can share one
+    assessment; commits may pass ``expected_version`` to fail with
+    ``ConflictError`` instead of overwriting a newer state.
+    """
+
+    backend = "json"
+
+    def __init__(self, data_file, journal_limit=DEFAULT_JOURNAL_LIMIT,
+                 catalog=None):
+        self.data_file = data_file
+        if catalog is not None:
+            self.counters = counters_for(catalog)
+        self.journal_file = data_file + JOURNAL_SUFFIX
+        self.file_lock = FileLock(data_file + LOCK_SUFFIX)
+        self.journal_limit = journal_limit
+        self.hits = 0
+        self.misses = 0
+        self.compactions = 0
+        self._data = None
+        self._stamp = None
+        self._snapshot = None
+        self._lock = threading.RLock()
+        self._compactor = None
+
+    def initialize(self):
+        if os.path.exists(self.data_file):
+            return
+        with self._lock, self.file_lock.exclusive():
+            if not os.path.exists(self.data_file):
+                write_json_atomic(self.data_file, new_state())
+
+    def _file_stamp(self):
+        st = os.stat(self.data_file)
+        try:
+            jst = os.stat(self.journal_file)
+        except FileNotFoundError:
+            journal = None
+        else:
+            journal = (jst.st_ino, jst.st_size, jst.st_mtime_ns)
+        return (st.st_ino, st.st_size, st.st_mtime_ns, journal)
+
+    def _read_journal(self):
+        try:
+            f = open(self.journal_file, 'r')
+        except FileNotFoundError:
+            return []
+        entries = []
+        with f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break  # torn final append from an interrupted writer
+                entries.append(json.loads(line))
+        return entries
+
+    def _read(self):
+        with open(self.data_file, 'r') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"{self.data_file}: not an assessment file")
+        data = _copy_state(data)
+        if self.counters is not None:
+            self.counters.ensure(data)
+        for entry in self._read_journal():
+            _apply_entry(data, entry, self.counters)
+        return data
+
+    def load(self):
+        with self._lock:
+            stamp = self._file_stamp()
+            if self._data is not None and stamp == self._stamp:
+                self.hits += 1
+                return self._data
+
+            self.misses += 1
+            with self.file_lock.shared():
+                self._stamp = self._file_stamp()
+                self._data = self._read()
+            self._snapshot = None
+            return self._data
+
+    def snapshot(self):
+        with self._lock:
+            data = self.load()
+            if self._snapshot is None:
+                self._snapshot = StateSnapshot(data)
+            return self._snapshot
+
+    def commit(self, statuses=None, notes=None, expected_version=None,
+               actor=None):
+        """Apply status and note changes as one atomic unit.
+
+        ``statuses`` maps control IDs to ``ControlStatus`` members and
+        ``notes`` maps control IDs to note text.  With ``expected_version``
+        the commit is refused with ``ConflictError`` unless the stored
+        state still has that version.  With a ``history``, the journal
+        entry also carries each control's old status and ``actor``, and
+        is handed to the history once the lock is released.
+        """
+        entry = {
+            'statuses': {control_id: status.name
+                         for control_id, status in (statuses or {}).items()},
+            'notes': dict(notes or {}),
+            'last_updated': str(datetime.now()),
+        }
+        with self._lock, self.file_lock.exclusive():
+            data = _copy_state(self.load())
+            _check_version(data, expected_version)
+            entry['version'] = data.get('version', 0) + 1
+            if self.history is not None:
+                from iso27001_history import default_actor
+                entry['old'] = {
+                    control_id: data['controls_status'].get(control_id,
+                                                            "NOT_STARTED")
+                    for control_id in entry['statuses']}
+                entry['actor'] = actor or default_actor()
+            _apply_entry(data, entry, self.counters)
+            if self.journal_limit is None:
+                write_json_atomic(self.data_file, data)
+            else:
+                self._append_journal(entry)
+            self._data = data
+            self._stamp = self._file_stamp()
+            self._snapshot = None
+
+            if (self.journal_limit is not None
+                    and self._stamp[3] is not None
+                    and self._stamp[3][1] > self.journal_limit):
+                self.compact(background=True)
+        if self.history is not None:
+            self.history.submit(entry)
+
+    def _append_journal(self, entry):
+        with open(self.journal_file, 'a+b') as f:
+            _trim_torn_line(f)
+            f.write((json.dumps(entry) + '\n').encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def compact(self, background=False):
+        """Fold the journal into a fresh snapshot and remove it.
+
+        Journal entries only ever set values, so replaying an entry that is
+        already part of the snapshot is harmless; a crash between the rename
+        and the journal removal therefore loses nothing.
+        """
+        if background:
+            with self._lock:
+                if self._compactor is not None and self._compactor.is_alive():
+                    return
+                self._compactor = threading.Thread(
+                    target=self.compact, name="iso27001-compaction")
+                self._compactor.start()
+            return
+
+        with self._lock, self.file_lock.exclusive():
+            if self.history is not None:
+                # Let the history take the journal's entries first; if it
+                # can't, it records the difference as recovered later.
+                try:
+                    self.history.sync()
+                except Exception:
+                    pass
+            self._replace_snapshot(self._read())
+            self.compactions += 1
+
+    def history_entries(self, after=None):
+        with self._lock, self.file_lock.shared():
+            data = self.load()
+            version = data.get('version', 0)
+            entries = []
+            if after is None or version > after:
+                try:
+                    with open(self.journal_file, 'r') as f:
+                        lines = f.readlines()
+                except FileNotFoundError:
+                    lines = []
+                # Newest first, so only the entries after ``after`` are
+                # decoded.
+                for line in reversed(lines):
+                    if not line.endswith('\n'):
+                        continue  # torn final append
+                    entry = json.loads(line)
+                    if 'old' not in entry or (
+                            after is not None and entry['version'] <= after):
+                        break
+                    entries.append(entry)
+                entries.reverse()
+            return version, dict(data['controls_status']), entries
+
+    def _replace_snapshot(self, data):
+        write_json_atomic(self.data_file, data)
+        try:
+            os.remove(self.journal_file)
+        except FileNotFoundError:
+            pass
+        self._data = data
+        self._stamp = self._file_stamp()
+        self._snapshot = None
+
+    def export_state(self):
+        data = _copy_state(self.load())
+        data.pop('counters', None)
+        return data
+
+    def import_state(self, data):
+        data = _copy_state(data)
+        data.pop('counters', None)
+        if self.counters is not None:
+            self.counters.ensure(data)
+        with self._lock, self.file_lock.exclusive():
+            try:
+                current = self.load().get('version', 0)
+            except (OSError, ValueError):
+                current = 0
+            # Keep versions increasing even when importing older state.
+            data['version'] = max(data.get('version', 0), current + 1)
+            self._replace_snapshot(data)
+
+    def _rebuild_counters(self):
+        with self._lock, self.file_lock.exclusive():
+            data = self._read()
+            data['counters'] = self.counters.rebuild(data['controls_status'])
+            self._replace_snapshot(data)
+
+    def close(self):
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        if self.history is not None:
+            self.history.close()
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._data = None
+            self._stamp = None
+            self._snapshot = None
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "compactions": self.compactions, "conflicts": self.conflicts}
+
+
+def read_snapshot(data_file, catalog=None):
+    """Read a JSON assessment and its journal without the file lock.
+
+    No ``.lock`` file is created, so this works on read-only copies; a
+    commit landing during the read may be missed.
+    """
+    return StateSnapshot(JsonStore(data_file, catalog=catalog)._read())
+
+
+def resolve_backend(data_file=None, backend=None):
+    if backend is None and data_file is not None:
+        lowered = data_file.lower()
+        if lowered.endswith(SQLITE_SUFFIXES):
+            backend = "sqlite"
+        elif lowered.endswith(".json"):
+            backend = "json"
+    if backend is None:
+        backend = os.environ.get("ISO27001_BACKEND", DEFAULT_BACKEND)
+    if backend not in DEFAULT_DATA_FILES:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return backend
+
+
+def open_store(data_file=None, backend=None, catalog=None, history=None,
+               durable=False, **options):
+    """Open the assessment at ``data_file`` with the requested backend.
+
+    Without an explicit ``backend`` it is inferred from the file extension
+    (``.json`` or ``.db``/``.sqlite``), then from ``$ISO27001_BACKEND``,
+    and finally defaults to the JSON file format.  Passing the control
+    ``catalog`` enables the compliance counters and, unless ``history`` is
+    false or ``$ISO27001_HISTORY`` is ``0``, the status history.  With
+    ``durable`` every SQLite commit is synced to disk before it returns, as
+    JSON commits always are.
+    """
+    backend = resolve_backend(data_file, backend)
+    data_file = data_file or DEFAULT_DATA_FILES[backend]
+    if backend == "sqlite":
+        from iso27001_sqlite import SqliteStore
+        store = SqliteStore(data_file, catalog=catalog, durable=durable,
+                            **options)
+    else:
+        store = JsonStore(data_file, catalog=catalog, **options)
+    if history is None:
+        history = os.environ.get("ISO27001_HISTORY", "1") != "0"
+    if catalog is not None and history:
+        from iso27001_history import history_for
+        store.history = history_for(data_file, catalog)
+        store.history.source = store
+    return store
+
+
+def migrate(source, target, source_backend=None, target_backend=None):
+    """Copy the full assessment state from ``source`` into ``target``."""
+    src = open_store(source, source_backend)
+    dst = open_store(target, target_backend)
+    try:
+        src.initialize()
+        data = src.export_state()
+        dst.initialize()
+        dst.import_state(data)
+    finally:
+        src.close()
+        dst.close()
+    return len(data['controls_status']), len(data.get('control_notes', {}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Maintenance commands for ISO 27001 assessment stores.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_cmd = commands.add_parser(
+        "migrate", help="convert an assessment between storage backends")
+    migrate_cmd.add_argument("source")
+    migrate_cmd.add_argument("target")
+    migrate_cmd.add_argument("--from", dest="source_backend",
+                             choices=sorted(DEFAULT_DATA_FILES))
+    migrate_cmd.add_argument("--to", dest="target_backend",
+                             choices=sorted(DEFAULT_DATA_FILES))
+    check_cmd = commands.add_parser(
+        "check-counters",
+        help="recount an assessment and report compliance counter drift")
+    check_cmd.add_argument("data_file")
+    check_cmd.add_argument("--catalog", default=DEFAULT_CATALOG_FILE,
+                           help="catalog file the counters are based on")
+    check_cmd.add_argument("--repair", action="store_true",
+                           help="replace drifted counters with the recount")
+    args = parser.parse_args(argv)
+
+    if args.command == "check-counters":
+        from iso27001_catalog import load_catalog_file
+        store = open_store(args.data_file,
+                           catalog=load_catalog_file(args.catalog))
+        try:
+            store.initialize()
+            mismatches = store.check_counters(repair=args.repair)
+        finally:
+            store.close()
+        for group, bucket, status, stored, expected in mismatches:
+            label = group if bucket is None else f"{group} {bucket}"
+            print(f"{label} {status}: stored {stored}, expected {expected}")
+        if not mismatches:
+            print("Counters are consistent.")
+        elif args.repair:
+            print(f"Repaired {len(mismatches)} counters.")
+        return 1 if mismatches and not args.repair else 0
+
+    if args.command == "migrate":
+        statuses, notes = migrate(args.source, args.target,
+                                  args.source_backend, args.target_backend)
+        print(f"Migrated {statuses} statuses and {notes} notes "
+              f"from {args.source} to {args.target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
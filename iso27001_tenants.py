@@ -0,0 +1,96 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from iso27001_store import DEFAULT_DATA_FILES, open_store, resolve_backend
+
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$")
+DEFAULT_MAX_OPEN = 64
+
+
+class TenantRegistry:
+    """Serves many organizations' assessments from one directory tree.
+
+    Each tenant lives at ``<root>/<aa>/<bb>/<tenant_id>/<data file>``, where
+    ``aa``/``bb`` come from a hash of the tenant ID so no single directory
+    grows unbounded.  Stores are opened on first use and kept in an LRU of
+    at most ``max_open`` entries.  Evicted stores are closed, which drops
+    their cached state and connections; callers that still hold one can
+    keep using it and it reopens them on demand.  Stores are opened
+    ``durable`` when the registry is.
+    """
+
+    def __init__(self, root, backend=None, max_open=DEFAULT_MAX_OPEN,
+                 catalog=None, durable=False):
+        self.root = root
+        self.backend = resolve_backend(backend=backend)
+        self.catalog = catalog
+        self.durable = durable
+        self.max_open = max_open
+        self.opens = 0
+        self.evictions = 0
+        self._stores = OrderedDict()
+        self._lock = threading.RLock()
+
+    def validate_tenant_id(self, tenant_id):
+        if not TENANT_ID_PATTERN.match(tenant_id) or tenant_id in (".", ".."):
+            raise ValueError(f"Invalid tenant ID: {tenant_id!r}")
+        return tenant_id
+
+    def path_for(self, tenant_id):
+        self.validate_tenant_id(tenant_id)
+        digest = hashlib.sha1(tenant_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest[:2], digest[2:4], tenant_id,
+                            DEFAULT_DATA_FILES[self.backend])
+
+    def get(self, tenant_id):
+        with self._lock:
+            store = self._stores.get(tenant_id)
+            if store is not None:
+                self._stores.move_to_end(tenant_id)
+                return store
+
+            path = self.path_for(tenant_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            store = open_store(path, self.backend, catalog=self.catalog,
+                               durable=self.durable)
+            store.initialize()
+            self.opens += 1
+            self._stores[tenant_id] = store
+            while len(self._stores) > self.max_open:
+                _, evicted = self._stores.popitem(last=False)
+                evicted.close()
+                self.evictions += 1
+            return store
+
+    def exists(self, tenant_id):
+        return os.path.exists(self.path_for(tenant_id))
+
+    def tenants(self):
+        """Yield the IDs of every tenant that has an assessment on disk."""
+        data_file = DEFAULT_DATA_FILES[self.backend]
+        if not os.path.isdir(self.root):
+            return
+        for shard in sorted(os.listdir(self.root)):
+            shard_dir = os.path.join(self.root, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for sub in sorted(os.listdir(shard_dir)):
+                sub_dir = os.path.join(shard_dir, sub)
+                if not os.path.isdir(sub_dir):
+                    continue
+                for tenant_id in sorted(os.listdir(sub_dir)):
+                    if os.path.exists(os.path.join(sub_dir, tenant_id, data_file)):
+                        yield tenant_id
+
+    def close(self):
+        with self._lock:
+            while self._stores:
+                _, store = self._stores.popitem(last=False)
+                store.close()
+
+    def stats(self):
+        return {"open": len(self._stores), "opens": self.opens,
+                "evictions": self.evictions}
@@ -0,0 +1,356 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from iso27001_catalog import default_catalog
+from iso27001_client import remove_stale_socket
+from iso27001_store import ControlStatus, open_store, parse_status
+
+DEFAULT_SOCKET = "iso27001_writer.sock"
+DEFAULT_MAX_BATCH = 512
+MAX_LINE = 1024 * 1024
+
+
+class WriterError(Exception):
+    """A mutation was rejected by the writer daemon."""
+
+
+class GroupCommitWriter:
+    """Owns the assessment store(s) and applies queued mutations in groups.
+
+    Mutations arriving while a commit is in progress wait in a queue; the
+    next round merges everything queued (up to ``max_batch``) into one
+    ``commit`` per assessment, i.e. one journal append and one fsync, and
+    only then resolves each caller's future.  Throughput therefore grows
+    with the number of concurrent writers instead of being capped by the
+    fsync rate.  ``max_delay`` optionally holds a round open to gather
+    more mutations.
+    """
+
+    def __init__(self, catalog, store=None, registry=None,
+                 max_batch=DEFAULT_MAX_BATCH, max_delay=0.0):
+        if (store is None) == (registry is None):
+            raise ValueError("Pass exactly one of store or registry")
+        self.catalog = catalog
+        self.store = store
+        self.registry = registry
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.mutations = 0
+        self.batches = 0
+        self.commits = 0
+        self.largest_batch = 0
+        # One thread, so commits never overlap.
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self._queue = None
+        self._batcher = None
+
+    def validate(self, request):
+        """Return ``(tenant_id, statuses, notes)`` from a request object."""
+        tenant_id = request.get("tenant")
+        if self.registry is not None:
+            if not tenant_id:
+                raise WriterError("missing tenant")
+            try:
+                self.registry.validate_tenant_id(str(tenant_id))
+            except ValueError as e:
+                raise WriterError(str(e))
+        elif tenant_id:
+            raise WriterError("this writer serves a single assessment")
+
+        statuses = {}
+        for raw_id, name in (request.get("statuses") or {}).items():
+            control_id = self._control_id(raw_id)
+            try:
+                statuses[control_id] = parse_status(str(name))
+            except ValueError as e:
+                raise WriterError(str(e))
+        notes = {self._control_id(raw_id): str(note)
+                 for raw_id, note in (request.get("notes") or {}).items()}
+        if not statuses and not notes:
+            raise WriterError("nothing to commit")
+        return tenant_id, statuses, notes
+
+    def _control_id(self, raw_id):
+        control_id = self.catalog.normalize_id(str(raw_id))
+        if control_id is None:
+            raise WriterError(f"Unknown control ID: {raw_id}")
+        return control_id
+
+    async def submit(self, tenant_id, statuses, notes):
+        """Queue one mutation; returns the state version that made it durable."""
+        if self._batcher is None:
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.ensure_future(self._run_batches())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((tenant_id, statuses, notes, future))
+        return await future
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            if self.max_delay:
+                await asyncio.sleep(self.max_delay)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            groups = {}
+            for tenant_id, statuses, notes, future in batch:
+                group = groups.setdefault(tenant_id, ({}, {}, []))
+                group[0].update(statuses)
+                group[1].update(notes)
+                group[2].append(future)
+            results = await loop.run_in_executor(
+                self.executor, self._commit_groups, groups)
+
+            self.batches += 1
+            self.mutations += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for tenant_id, (_, _, futures) in groups.items():
+                result = results[tenant_id]
+                for future in futures:
+                    if future.done():
+                        continue
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+
+    def _commit_groups(self, groups):
+        results = {}
+        for tenant_id, (statuses, notes, _) in groups.items():
+            try:
+                store = (self.store if self.registry is None
+                         else self.registry.get(tenant_id))
+                store.commit(statuses=statuses or None, notes=notes or None)
+                results[tenant_id] = store.snapshot().version
+                self.commits += 1
+            except Exception as e:
+                results[tenant_id] = e
+        return results
+
+    def stats(self):
+        return {"mutations": self.mutations, "batches": self.batches,
+                "commits": self.commits, "largest_batch": self.largest_batch,
+                "average_batch": (round(self.mutations / self.batches, 2)
+                                  if self.batches else 0.0)}
+
+    async def handle(self, reader, writer):
+        pending = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    break
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._answer(line, writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+        finally:
+            writer.close()
+
+    async def _answer(self, line, writer):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise WriterError("expected a JSON object")
+            request_id = request.get("id")
+            if request.get("op") == "stats":
+                response = {"ok": True, "stats": self.stats()}
+            else:
+                version = await self.submit(*self.validate(request))
+                response = {"ok": True, "version": version}
+        except (ValueError, WriterError) as e:
+            response = {"ok": False, "error": str(e)}
+        except Exception as e:
+            # Commit failures (disk full...) must still answer the client.
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        response["id"] = request_id
+        writer.write(json.dumps(response).encode("utf-8") + b"\n")
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def serve(self, path):
+        remove_stale_socket(path, "A writer")
+        server = await asyncio.start_unix_server(self.handle, path,
+                                                 limit=MAX_LINE)
+        os.chmod(path, 0o600)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        if self.registry is not None:
+            self.registry.close()
+        else:
+            self.store.close()
+
+
+class WriterClient:
+    """Blocking client for ``GroupCommitWriter``.
+
+    ``submit`` returns once the change is durable.  ``submit_many`` sends
+    several mutations before waiting, so they can share one group commit.
+    """
+
+    def __init__(self, path=DEFAULT_SOCKET, timeout=30.0):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(path)
+        self._file = self._sock.makefile("rb")
+        self._next_id = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _request(self, request):
+        self._next_id += 1
+        request["id"] = self._next_id
+        return json.dumps(request).encode("utf-8") + b"\n"
+
+    def _responses(self, count):
+        responses = {}
+        for _ in range(count):
+            line = self._file.readline()
+            if not line:
+                raise ConnectionError("Writer closed the connection")
+            response = json.loads(line)
+            responses[response["id"]] = response
+        return responses
+
+    def submit_many(self, mutations):
+        """Send ``(statuses, notes, tenant)`` triples; return their versions.
+
+        Rejected mutations are returned as ``WriterError`` instances.
+        """
+        payload = b"".join(
+            self._request(_mutation(statuses, notes, tenant))
+            for statuses, notes, tenant in mutations)
+        first_id = self._next_id - len(mutations) + 1
+        self._sock.sendall(payload)
+        responses = self._responses(len(mutations))
+        results = []
+        for request_id in range(first_id, self._next_id + 1):
+            response = responses[request_id]
+            results.append(response["version"] if response["ok"]
+                           else WriterError(response["error"]))
+        return results
+
+    def submit(self, statuses=None, notes=None, tenant=None):
+        result = self.submit_many([(statuses, notes, tenant)])[0]
+        if isinstance(result, WriterError):
+            raise result
+        return result
+
+    def stats(self):
+        self._sock.sendall(self._request({"op": "stats"}))
+        return self._responses(1)[self._next_id]["stats"]
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+
+def _mutation(statuses, notes, tenant):
+    request = {"statuses": {control_id: (status.name
+                                         if isinstance(status, ControlStatus)
+                                         else status)
+                            for control_id, status in (statuses or {}).items()},
+               "notes": dict(notes or {})}
+    if tenant is not None:
+        request["tenant"] = tenant
+    return request
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Single-writer daemon that group-commits status changes.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET,
+                        help=f"Unix socket path (default: {DEFAULT_SOCKET})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_cmd = commands.add_parser("serve", help="run the writer daemon")
+    serve_cmd.add_argument("--data-file")
+    serve_cmd.add_argument("--backend", choices=("json", "sqlite"))
+    serve_cmd.add_argument("--tenants", metavar="ROOT")
+    serve_cmd.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    serve_cmd.add_argument("--max-delay-ms", type=float, default=0.0,
+                           help="wait this long to gather each batch")
+
+    set_cmd = commands.add_parser("set-status",
+                                  help="submit one change and wait for it")
+    set_cmd.add_argument("control_id")
+    set_cmd.add_argument("status")
+    set_cmd.add_argument("--note")
+    set_cmd.add_argument("--tenant")
+
+    commands.add_parser("stats", help="show batching statistics")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        catalog = default_catalog()
+        if args.tenants:
+            from iso27001_tenants import TenantRegistry
+            writer = GroupCommitWriter(
+                catalog, registry=TenantRegistry(args.tenants, args.backend,
+                                                 catalog=catalog,
+                                                 durable=True),
+                max_batch=args.max_batch, max_delay=args.max_delay_ms / 1000)
+        else:
+            store = open_store(args.data_file, args.backend, catalog=catalog,
+                               durable=True)
+            store.initialize()
+            writer = GroupCommitWriter(catalog, store=store,
+                                       max_batch=args.max_batch,
+                                       max_delay=args.max_delay_ms / 1000)
+        print(f"Writer listening on {args.socket}", file=sys.stderr)
+        try:
+            asyncio.run(writer.serve(args.socket))
+        except KeyboardInterrupt:
+            pass
+        except OSError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+        finally:
+            writer.close()
+        return 0
+
+    try:
+        with WriterClient(args.socket) as client:
+            if args.command == "stats":
+                print(json.dumps(client.stats(), indent=2))
+                return 0
+            version = client.submit(
+                {args.control_id: args.status},
+                {args.control_id: args.note} if args.note is not None
+                else None, args.tenant)
+    except (OSError, WriterError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(f"Committed as version {version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from iso27001_catalog import default_catalog  # noqa: E402
+from iso27001_store import ControlStatus, open_store  # noqa: E402
+
+
+class HistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        # Cleanups run last-in first-out: stores close before this.
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.catalog = default_catalog()
+        self.data_file = os.path.join(self.tmp, "assessment.json")
+
+    def open(self, history=None):
+        store = open_store(self.data_file, catalog=self.catalog,
+                           history=history)
+        store.initialize()
+        self.addCleanup(store.close)
+        return store
+
+    def test_progress_from_before_the_history_is_kept(self):
+        self.open(history=False).commit(statuses={
+            "A.5.1": ControlStatus.IMPLEMENTED,
+            "A.5.2": ControlStatus.IN_PROGRESS})
+        store = self.open()
+        store.commit(statuses={"A.5.3": ControlStatus.IMPLEMENTED})
+
+        first = next(store.history.transitions())
+        self.assertEqual(first.control_id, "A.5.3")
+        before = {"A.5.1": ControlStatus.IMPLEMENTED,
+                  "A.5.2": ControlStatus.IN_PROGRESS}
+        self.assertEqual(store.history.statuses_at(first.timestamp - 1),
+                         before)
+        self.assertEqual(store.history.statuses_at(first.timestamp),
+                         dict(before, **{"A.5.3": ControlStatus.IMPLEMENTED}))
+
+    def test_commits_never_handed_over_are_read_from_the_journal(self):
+        store = self.open()
+        store.commit(statuses={"A.5.1": ControlStatus.IN_PROGRESS},
+                     actor="alice")
+        # As if the writer died between its commit and the hand-over.
+        store.history.submit = lambda entry: None
+        self.addCleanup(delattr, store.history, "submit")
+        store.commit(statuses={"A.5.1": ControlStatus.IMPLEMENTED},
+                     actor="bob")
+
+        rows = [(row.control_id, row.old.name, row.new.name, row.actor)
+                for row in store.history.transitions()]
+        self.assertEqual(rows, [
+            ("A.5.1", "NOT_STARTED", "IN_PROGRESS", "alice"),
+            ("A.5.1", "IN_PROGRESS", "IMPLEMENTED", "bob")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,215 @@
+import asyncio
+import http.client
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from iso27001_catalog import default_catalog  # noqa: E402
+from iso27001_server import AssessmentServer  # noqa: E402
+from iso27001_store import open_store  # noqa: E402
+from iso27001_tenants import TenantRegistry  # noqa: E402
+
+
+class ServerHarness:
+    """Run an ``AssessmentServer`` on 127.0.0.1 (any free port) in a thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        async def start():
+            self.server = await asyncio.start_server(app.handle, "127.0.0.1", 0)
+            self.port = self.server.sockets[0].getsockname()[1]
+            started.set()
+
+        self.thread = threading.Thread(
+            target=lambda: (self.loop.run_until_complete(start()),
+                            self.loop.run_forever()), daemon=True)
+        self.thread.start()
+        started.wait(10)
+
+    def connect(self):
+        return http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+
+    def close(self):
+        async def stop():
+            self.server.close()
+            await self.server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(stop(), self.loop).result(10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(10)
+        self.loop.close()
+        self.app.close()
+
+
+def request(conn, method, path, body=None, headers=None):
+    payload = json.dumps(body).encode("utf-8") if isinstance(body, dict) else body
+    conn.request(method, path, body=payload, headers=headers or {})
+    response = conn.getresponse()
+    data = response.read()
+    return response, json.loads(data) if data else None
+
+
+class SingleStoreServerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        catalog = default_catalog()
+        store = open_store(os.path.join(self.tmp, "assessment.json"),
+                           catalog=catalog)
+        store.initialize()
+        self.harness = ServerHarness(AssessmentServer(catalog, store=store,
+                                                      workers=2))
+        self.conn = self.harness.connect()
+
+    def tearDown(self):
+        self.conn.close()
+        self.harness.close()
+        shutil.rmtree(self.tmp)
+
+    def test_keep_alive_reuses_connection(self):
+        response, _ = request(self.conn, "GET", "/report")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Connection"), "keep-alive")
+        sock = self.conn.sock
+        response, body = request(self.conn, "GET", "/controls?domain=people")
+        self.assertEqual(response.status, 200)
+        self.assertIs(self.conn.sock, sock)
+        self.assertTrue(body)
+        self.assertTrue(all(row["domain"] == "People" for row in body))
+
+    def test_put_then_get(self):
+        response, body = request(self.conn, "PUT", "/controls/a.5.1",
+                                 {"status": "implemented", "note": "Approved"})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body["status"], "IMPLEMENTED")
+        etag = response.getheader("ETag")
+
+        response, body = request(self.conn, "GET", "/controls/A.5.1")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body["status"], "IMPLEMENTED")
+        self.assertEqual(body["note"], "Approved")
+        self.assertEqual(response.getheader("ETag"), etag)
+
+        response, body = request(self.conn, "GET", "/controls/A.5.1",
+                                 headers={"If-None-Match": etag})
+        self.assertEqual(response.status, 304)
+        self.assertIsNone(body)
+
+        _, report = request(self.conn, "GET", "/report")
+        self.assertEqual(report["status_counts"]["IMPLEMENTED"], 1)
+
+    def test_bad_requests(self):
+        response, body = request(self.conn, "PUT", "/controls/A.5.1",
+                                 b"not json")
+        self.assertEqual(response.status, 400)
+        self.assertIn("error", body)
+        response, _ = request(self.conn, "PUT", "/controls/A.5.1",
+                              {"status": "done-ish"})
+        self.assertEqual(response.status, 400)
+        response, _ = request(self.conn, "GET", "/controls?status=bogus")
+        self.assertEqual(response.status, 400)
+
+    def test_unreadable_bodies_are_rejected(self):
+        for header, status in [(b"Content-Length: -1", 400),
+                               (b"Content-Length: 1x", 400),
+                               (b"Transfer-Encoding: chunked", 501)]:
+            with socket.create_connection(("127.0.0.1", self.harness.port),
+                                          timeout=10) as sock:
+                sock.sendall(b"PUT /controls/A.5.1 HTTP/1.1\r\n" + header +
+                             b"\r\n\r\n2\r\n{}\r\n0\r\n\r\n")
+                data = b""
+                while True:
+                    chunk = sock.recv(65536)
+                    if not chunk:
+                        break
+                    data += chunk
+            # One answer, then the connection is closed: the rest of the
+            # body is never read as another request.
+            self.assertTrue(data.startswith(b"HTTP/1.1 %d " % status), data)
+            self.assertEqual(data.count(b"HTTP/1.1 "), 1)
+
+    def test_not_found_and_method_not_allowed(self):
+        response, _ = request(self.conn, "GET", "/controls/A.99.1")
+        self.assertEqual(response.status, 404)
+        response, _ = request(self.conn, "GET", "/nowhere")
+        self.assertEqual(response.status, 404)
+        response, _ = request(self.conn, "DELETE", "/controls/A.5.1")
+        self.assertEqual(response.status, 405)
+        response, _ = request(self.conn, "POST", "/report")
+        self.assertEqual(response.status, 405)
+        # Errors keep the connection usable.
+        response, _ = request(self.conn, "GET", "/report")
+        self.assertEqual(response.status, 200)
+
+    def test_stores_in_one_process_keep_their_own_views(self):
+        request(self.conn, "PUT", "/controls/A.5.1", {"status": "implemented"})
+        _, report = request(self.conn, "GET", "/report")
+        self.assertEqual(report["status_counts"]["IMPLEMENTED"], 1)
+
+        # A second store at the same version, served from the same
+        # process-wide render cache.
+        catalog = default_catalog()
+        store = open_store(os.path.join(self.tmp, "other.json"),
+                           catalog=catalog)
+        store.initialize()
+        other = ServerHarness(AssessmentServer(catalog, store=store,
+                                               workers=2))
+        conn = other.connect()
+        try:
+            request(conn, "PUT", "/controls/A.5.1", {"status": "in-progress"})
+            _, report = request(conn, "GET", "/report")
+        finally:
+            conn.close()
+            other.close()
+        self.assertEqual(report["status_counts"]["IMPLEMENTED"], 0)
+        self.assertEqual(report["status_counts"]["IN_PROGRESS"], 1)
+
+
+class TenantServerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        catalog = default_catalog()
+        self.registry = TenantRegistry(os.path.join(self.tmp, "tenants"),
+                                       catalog=catalog)
+        self.harness = ServerHarness(AssessmentServer(
+            catalog, registry=self.registry, workers=2))
+        self.conn = self.harness.connect()
+
+    def tearDown(self):
+        self.conn.close()
+        self.harness.close()
+        shutil.rmtree(self.tmp)
+
+    def test_get_of_unknown_tenant_creates_nothing(self):
+        response, _ = request(self.conn, "GET", "/tenants/typo/report")
+        self.assertEqual(response.status, 404)
+        response, _ = request(self.conn, "GET", "/tenants/typo/controls/A.5.1")
+        self.assertEqual(response.status, 404)
+        self.assertEqual(list(self.registry.tenants()), [])
+
+    def test_put_creates_tenant(self):
+        response, _ = request(self.conn, "PUT", "/tenants/acme/controls/A.5.1",
+                              {"status": "in-progress"})
+        self.assertEqual(response.status, 200)
+        response, body = request(self.conn, "GET",
+                                 "/tenants/acme/controls/A.5.1")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body["status"], "IN_PROGRESS")
+        self.assertEqual(list(self.registry.tenants()), ["acme"])
+
+    def test_invalid_tenant_id(self):
+        response, _ = request(self.conn, "GET", "/tenants/..%2Fx/report")
+        self.assertEqual(response.status, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()